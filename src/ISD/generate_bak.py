@@ -1,6 +1,7 @@
 import math
 
 import numpy as np
+from cls_gf2 import rank_gf2
 
 
 def generate_H(n, k, cnt):
@@ -17,26 +18,6 @@ def generate_H(n, k, cnt):
     H (ndarray): The bit-packed matrix with n+1 encoded.
     """
 
-    def rank_mod2(matrix):
-        """Computes the rank of a binary matrix over GF(2) using Gaussian elimination."""
-        A = matrix.copy() % 2
-        rows, cols = A.shape
-        rank = 0
-        for col in range(cols):
-            pivot = -1
-            for row in range(rank, rows):
-                if A[row, col] == 1:
-                    pivot = row
-                    break
-            if pivot == -1:
-                continue
-            A[[rank, pivot]] = A[[pivot, rank]]
-            for r in range(rows):
-                if r != rank and A[r, col] == 1:
-                    A[r] = (A[r] + A[rank]) % 2
-            rank += 1
-        return rank
-
     # Number of uint64 units per row (includes n columns, extra '1' bit and padded zeros up to multiple of 64).
     num_units = math.ceil((n + 1) / 64)
 
@@ -45,7 +26,7 @@ def generate_H(n, k, cnt):
         # Generate random binary elements of the matrix
         H_binary = np.random.randint(0, 2, (k, n), dtype=np.uint8)
         # Ensure full row rank before continuing
-        if rank_mod2(H_binary) == k:
+        if rank_gf2(H_binary) == k:
             break
 
     H = np.zeros((k, num_units), dtype=np.uint64)
@@ -3,6 +3,8 @@ import os
 import threading
 from tkinter import ttk, messagebox
 from cls_Generate import generate_H, generate_m
+from cls_uint64_tools import bitpacked_dot_row_optimized
+from cls_decoders import decode
 from NEW.spreadsheet import Spreadsheet  # Import the Spreadsheet widget
 
 
@@ -13,6 +15,7 @@ class ISDApp(tk.Tk):
     last_n = ""
     last_k = ""
     last_t = ""
+    default_budget = 1000
 
     def __init__(self):
         super().__init__()
@@ -142,6 +145,14 @@ class ISDApp(tk.Tk):
         self.algorithm_3_tab = ttk.Frame(self.algorithm_tabs)
         self.algorithm_tabs.add(self.algorithm_3_tab, text="Algorithm 3")
 
+        # Information-set decoders run from the algorithm tabs
+        self.H = None
+        self.m = None
+        self.t = None
+        self.create_algorithm_tab(self.algorithm_1_tab, "prange", "Prange")
+        self.create_algorithm_tab(self.algorithm_2_tab, "lee_brickell", "Lee-Brickell (p = 2)", p=2)
+        self.create_algorithm_tab(self.algorithm_3_tab, "stern", "Stern (p = 2)", p=2)
+
         # Progress indicator within pnl_progress_data (overlayed on top of the notebooks area)
         self.progress_label = tk.Label(self.pnl_progress_data, text="",
                                        font=("Arial", 12))
@@ -152,6 +163,49 @@ class ISDApp(tk.Tk):
         self.progress_spinner.place_forget()
         self.progress_spinner.stop()
 
+    def create_algorithm_tab(self, tab, algorithm, title, **params):
+        tab.columnconfigure(1, weight=1)
+        tk.Label(tab, text=title, font=("Arial", 12, "bold")).grid(row=0, column=0, columnspan=3, sticky="w", padx=10, pady=10)
+        tk.Label(tab, text="Iteration budget =").grid(row=1, column=0, sticky="w", padx=(10, 0))
+        budget_entry = ttk.Entry(tab)
+        budget_entry.insert(0, str(self.default_budget))
+        budget_entry.grid(row=1, column=1, sticky="ew")
+        result_label = tk.Label(tab, text="", justify="left", anchor="w")
+        result_label.grid(row=2, column=0, columnspan=3, sticky="ew", padx=10, pady=10)
+        run_button = tk.Button(tab, text="Run", width=15,
+                               command=lambda: self.run_algorithm(algorithm, params, budget_entry, result_label))
+        run_button.grid(row=1, column=2, padx=10)
+
+    def run_algorithm(self, algorithm, params, budget_entry, result_label):
+        if self.H is None:
+            messagebox.showerror("Input Error", "Initialize matrix (H) and vector (m) first.")
+            return
+        try:
+            budget = int(budget_entry.get())
+        except ValueError:
+            messagebox.showerror("Input Error", "Iteration budget must be a non-empty integer value.")
+            return
+        result_label.config(text="Running...")
+        threading.Thread(target=self._process_algorithm, args=(algorithm, params, budget, result_label), daemon=True).start()
+
+    def _process_algorithm(self, algorithm, params, budget, result_label):
+        try:
+            y = bitpacked_dot_row_optimized(self.H, self.m)
+            result = decode(self.H, y, self.t, budget=budget, algorithm=algorithm, **params)
+        except Exception as error:
+            message = f"{type(error).__name__}: {error}"
+            self.after(0, lambda: result_label.config(text=""))
+            self.after(0, lambda: messagebox.showerror("Decoder Error", message))
+            return
+        if result.success:
+            text = f"Solution found: m = {', '.join(map(str, result.support))}\n"
+        else:
+            text = "No solution found within the iteration budget.\n"
+        text += (f"Iterations: {result.iterations}\n"
+                 f"Time: {result.seconds:.3f} s\n"
+                 f"Iterations/s: {result.iterations_per_second:.1f}")
+        self.after(0, lambda: result_label.config(text=text))
+
     def on_option_change(self, *args):
         if self.sel_init.get() == "generate":
             self.n_entry.config(state="normal")
@@ -239,6 +293,7 @@ class ISDApp(tk.Tk):
                     m = generate_m(n, t)
                     self.after(0, self.show_progress, "Saving generated matrix (H) and vector (m)...")
                     self.save_H_m(H, m)
+                    self.H, self.m, self.t = H, m, t
                     self.after(0, lambda: self.spreadsheet_H.SetData(H))  # Assign H to the Spreadsheet widget
                     self.after(0, self.hide_progress)
                     #self.after(0, self.top_frame.grid)
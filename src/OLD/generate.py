@@ -1,30 +1,6 @@
 import numpy as np
 
-
-def rank_mod2(matrix):
-    """
-    Computes the rank of a binary matrix over GF(2) using Gaussian elimination.
-    """
-    A = matrix.copy() % 2
-    rows, cols = A.shape
-    rank = 0
-    for col in range(cols):
-        pivot = -1
-        # Find a pivot in the current column (starting from row "rank")
-        for row in range(rank, rows):
-            if A[row, col] == 1:
-                pivot = row
-                break
-        if pivot == -1:
-            continue  # No pivot in this column, move to next
-        # Swap the pivot row with the current row
-        A[[rank, pivot]] = A[[pivot, rank]]
-        # Eliminate all other ones in this column
-        for r in range(rows):
-            if r != rank and A[r, col] == 1:
-                A[r] = (A[r] + A[rank]) % 2
-        rank += 1
-    return rank
+from cls_gf2 import rank_gf2
 
 
 def generate_random_H(k=50, n=100):
@@ -41,7 +17,7 @@ def generate_random_H(k=50, n=100):
     # Generate random matrices until one has full row rank mod 2.
     while True:
         H = np.random.randint(0, 2, size=(k, n))
-        if rank_mod2(H) == k:
+        if rank_gf2(H) == k:
             break
 
     return H
@@ -0,0 +1,360 @@
+import math
+import time
+
+import numpy as np
+
+from cls_gf2 import _m4ri_eliminate
+from cls_method_1 import calculate_score
+from cls_uint64_tools import BATCH_CACHE_BYTES, as_bitmatrix, bitpacked_dot_support, permute_columns, \
+    popcount_uint64, transpose_uint64, _unpackbits_uint64
+
+class DecodeResult:
+    """Outcome of a decoder run: the solution (if found) and the work spent on it."""
+    __slots__ = ("algorithm", "support", "iterations", "seconds")
+
+    def __init__(self, algorithm, support, iterations, seconds):
+        self.algorithm = algorithm
+        self.support = support
+        self.iterations = iterations
+        self.seconds = seconds
+
+    @property
+    def success(self):
+        return self.support is not None
+
+    @property
+    def iterations_per_second(self):
+        return self.iterations / self.seconds if self.seconds > 0 else math.inf
+
+    def __repr__(self):
+        return (f"DecodeResult({self.algorithm}: success={self.success}, iterations={self.iterations}, "
+                f"{self.iterations_per_second:.1f} it/s)")
+
+class Prange:
+    """
+    Prange's information-set decoding on bit-packed H.
+
+    y = H * m holds over the integers, so its parity s = y mod 2 is a GF(2) syndrome of m.
+    In every iteration the columns of H are randomly permuted, and packed M4RI elimination
+    of [H | s] brings the first independent columns (the information set) to identity form
+    with s reduced to s'. If m has all its ones inside the information set, then m equals s'
+    on it. Candidates of weight t are verified against the integer syndrome y.
+    """
+    name = "Prange"
+
+    def __init__(self, rng=None):
+        self.rng = np.random.default_rng(rng)
+
+    def decode(self, H, y, t, budget=100, time_limit=None):
+        """
+        Searches for a vector m of Hamming weight t with H * m = y.
+
+        Parameters:
+        H: bit-packed matrix (BitMatrix or sentinel format), shape (k, units)
+        y: integer syndrome, shape (k,)
+        t (int): Hamming weight of m
+        budget (int): maximal number of iterations (information sets)
+        time_limit (float): maximal run time in seconds (None for no limit)
+
+        Returns:
+        DecodeResult: the support of m (None if not found) and the work spent
+        """
+        H = as_bitmatrix(H)
+        y = np.asarray(y, dtype=np.int64)
+        self._prepare(H, y, t)
+
+        start = time.perf_counter()
+        iteration = 0
+        while iteration < budget:
+            iteration += 1
+            support = self._iteration(H, y, t, self._column_order(H))
+            if support is not None:
+                return DecodeResult(self.name, support, iteration, time.perf_counter() - start)
+            if time_limit is not None and time.perf_counter() - start > time_limit:
+                break
+
+        return DecodeResult(self.name, None, iteration, time.perf_counter() - start)
+
+    def _prepare(self, H, y, t):
+        """Hook for per-instance precomputation before the first iteration."""
+
+    def _column_order(self, H):
+        """Returns the column permutation of the next iteration (uniformly random)."""
+        return self.rng.permutation(H.n)
+
+    def _iteration(self, H, y, t, order):
+        """Runs one iteration on the columns of H in the given order, returns a verified support or None."""
+        system = _SystematicSystem(H, y, order)
+        if system.pivots is None:
+            return None
+        return self._search(system, H, y, t)
+
+    def _search(self, system, H, y, t):
+        """Prange: m is zero outside the information set, so it equals s' on the information set."""
+        if system.s_weight != t:
+            return None
+        return _verified(H, y, system.support(system.s))
+
+class LeeBrickell(Prange):
+    """
+    Lee-Brickell information-set decoding: allows p ones of m outside the information set.
+    For every p-subset of the other columns (vectorized over all subsets), the XOR of their
+    reduced columns with s' must have weight t - p.
+    """
+    name = "Lee-Brickell"
+
+    def __init__(self, rng=None, p=2):
+        super().__init__(rng)
+        if p not in (1, 2):
+            raise ValueError("Lee-Brickell is implemented for p = 1 and p = 2.")
+        self.p = p
+
+    def _search(self, system, H, y, t):
+        support = super()._search(system, H, y, t)
+        if support is not None or t < self.p:
+            return support
+
+        columns = system.columns[system.non_pivots]
+        for sums, subsets in _subset_sums(columns, self.p, system.s):
+            weights = popcount_uint64(sums).sum(axis=1)
+            for candidate in np.flatnonzero(weights == t - self.p):
+                support = _verified(H, y, system.support(sums[candidate], system.non_pivots[subsets[candidate]]))
+                if support is not None:
+                    return support
+
+        return None
+
+class Stern(Prange):
+    """
+    Stern's information-set decoding: the columns outside the information set are split into
+    two random halves X and Y, and m is searched with p ones in each half. p-subset sums of both
+    halves are matched on l rows of s' (collision by sorting), and only colliding pairs are
+    checked for weight t - 2p on all rows. By default l is log2 of the number of subsets of
+    one half, so about one collision is expected per subset.
+    """
+    name = "Stern"
+
+    def __init__(self, rng=None, p=2, l=None):
+        super().__init__(rng)
+        if p not in (1, 2):
+            raise ValueError("Stern is implemented for p = 1 and p = 2.")
+        if l is not None and not 0 < l <= 64:
+            raise ValueError("Stern collision window l must be between 1 and 64 rows.")
+        self.p = p
+        self.l = l
+
+    def _search(self, system, H, y, t):
+        support = super()._search(system, H, y, t)
+        if support is not None or t < 2 * self.p:
+            return support
+
+        non_pivots = self.rng.permutation(system.non_pivots)
+        half = non_pivots.size // 2
+        x_columns, y_columns = non_pivots[:half], non_pivots[half:]
+
+        x_sums, x_subsets = _all_subset_sums(system.columns[x_columns], self.p, system.s)
+        y_sums, y_subsets = _all_subset_sums(system.columns[y_columns], self.p)
+
+        # Collisions on the first l rows of the information set
+        l = self.l or round(math.log2(max(2, y_sums.shape[0])))
+        l = max(1, min(l, 64, system.pivots.size))
+        window = np.uint64((1 << l) - 1) if l < 64 else np.uint64(0xFFFFFFFFFFFFFFFF)
+        chunk_size = max(1, BATCH_CACHE_BYTES // (x_sums.shape[1] * 8))
+
+        for x_idx, y_idx in _collisions(x_sums[:, 0] & window, y_sums[:, 0] & window, chunk_size):
+            sums = x_sums[x_idx] ^ y_sums[y_idx]
+            weights = popcount_uint64(sums).sum(axis=1)
+            for candidate in np.flatnonzero(weights == t - 2 * self.p):
+                outside = np.concatenate((x_columns[x_subsets[x_idx[candidate]]],
+                                          y_columns[y_subsets[y_idx[candidate]]]))
+                support = _verified(H, y, system.support(sums[candidate], outside))
+                if support is not None:
+                    return support
+
+        return None
+
+class ScoreGuided(Prange):
+    """
+    Prange's decoder with score-weighted instead of uniform information sets.
+
+    The Score = Phi + Phi_c of calculate_score ranks the columns by how likely they are in the
+    support, but the plain top t selection uses it only once. Here every iteration draws a
+    random column order in which column j comes early with weight exp(Score[j] / (T * std(Score))),
+    by sorting Score / (T * std(Score)) plus Gumbel noise (weighted sampling without replacement).
+    The elimination takes its pivots from the front of the order, so the information sets are
+    biased towards high-scoring columns and cover the support far more often than uniform ones.
+    A lower temperature T follows the score more closely, a higher one approaches Prange.
+    """
+    name = "Score-guided"
+
+    def __init__(self, rng=None, temperature=0.25):
+        super().__init__(rng)
+        if temperature <= 0:
+            raise ValueError("Temperature of the score weights must be positive.")
+        self.temperature = temperature
+        self.log_weights = None
+
+    def _prepare(self, H, y, t):
+        score = calculate_score(H, y, t).astype(np.float64)
+        spread = score.std()
+        self.log_weights = (score - score.max()) / (self.temperature * spread) if spread > 0 else np.zeros(H.n)
+
+    def _column_order(self, H):
+        return np.argsort(-(self.log_weights + self.rng.gumbel(size=H.n)), kind="stable")
+
+class _SystematicSystem:
+    """
+    [H | s] with the columns of H in a given order, brought to reduced row echelon form over GF(2)
+    by packed M4RI elimination. Holds the pivot (information set) columns, the reduced columns
+    restricted to the pivot rows (packed, column-major) and the reduced syndrome s'.
+    """
+    __slots__ = ("order", "pivots", "non_pivots", "columns", "s", "s_weight")
+
+    def __init__(self, H, y, order):
+        self.order = order
+
+        # Permuted H augmented with s = y mod 2 as column n
+        data = permute_columns(H, order).data.copy()
+        data[:, H.n // 64] |= (y & 1).astype(np.uint64) << np.uint64(H.n % 64)
+
+        pivots = _m4ri_eliminate(data, H.n, full=True)
+        rank = len(pivots)
+        s_bits = _unpackbits_uint64(data[:, H.n // 64:H.n // 64 + 1])[:, H.n % 64]
+        if s_bits[rank:].any():
+            # s is not in the column space of H (cannot happen for a valid syndrome)
+            self.pivots = None
+            return
+
+        self.pivots = np.array(pivots, dtype=np.int64)
+        self.non_pivots = np.setdiff1d(np.arange(H.n), self.pivots)
+
+        # Reduced columns on the pivot rows (the reduced s' is column n)
+        columns = transpose_uint64(data[:rank], H.n + 1)
+        self.columns = columns[:H.n]
+        self.s = columns[H.n]
+        self.s_weight = int(popcount_uint64(self.s).sum())
+
+    def support(self, pivot_rows_packed, outside=()):
+        """Maps ones of a packed vector over the pivot rows (plus extra columns) to original columns of H."""
+        rows = np.flatnonzero(_unpackbits_uint64(pivot_rows_packed)[:self.pivots.size])
+        columns = np.concatenate((self.pivots[rows], np.asarray(outside, dtype=np.int64)))
+        return np.sort(self.order[columns])
+
+def uniform_expected_iterations(n, k, t):
+    """
+    Expected number of iterations of Prange's decoder with uniform information sets:
+    the t support columns must all be among the k information set columns, C(n, t) / C(k, t).
+    """
+    return math.comb(n, t) / math.comb(k, t) if t <= k else math.inf
+
+def expected_iterations(results):
+    """
+    Estimates the expected number of iterations to success from decoder runs (the iterations
+    of all runs, including failed ones cut off by the budget, per solved instance).
+    """
+    solved = sum(result.success for result in results)
+    return sum(result.iterations for result in results) / solved if solved else math.inf
+
+def _verified(H, y, support):
+    """Returns support if it reproduces the integer syndrome y, None otherwise."""
+    return support if (bitpacked_dot_support(H, support) == y).all() else None
+
+def _subset_sums(columns, p, offset=None):
+    """
+    Yields chunks of (sums, subsets): XOR of every p-subset (p = 1 or 2) of the packed columns
+    (XORed with offset if given), and the indices of the subset columns, shape (chunk, p).
+    """
+    num_columns, num_units = columns.shape
+    if offset is None:
+        offset = np.zeros(num_units, dtype=np.uint64)
+
+    if p == 1:
+        yield columns ^ offset, np.arange(num_columns)[:, np.newaxis]
+        return
+
+    # p = 2: pairs (i, j), i < j, chunked by i so the temporary arrays stay small
+    chunk_size = max(1, BATCH_CACHE_BYTES // max(1, num_columns * num_units * 8))
+    for start in range(0, num_columns, chunk_size):
+        first = np.arange(start, min(start + chunk_size, num_columns))
+        first_idx, second_idx = np.nonzero(first[:, np.newaxis] < np.arange(num_columns)[np.newaxis, :])
+        first_idx = first[first_idx]
+        yield (columns[first_idx] ^ columns[second_idx] ^ offset,
+               np.stack((first_idx, second_idx), axis=1))
+
+def _collisions(x_keys, y_keys, chunk_size):
+    """
+    Yields chunks of (x_idx, y_idx): all index pairs with x_keys[x_idx] == y_keys[y_idx],
+    found by sorting y_keys. A chunk holds about chunk_size pairs (more only if a single
+    x key has more matches), so the pairs never have to be materialized all at once.
+    """
+    y_order = np.argsort(y_keys, kind="stable")
+    y_sorted = y_keys[y_order]
+    left = np.searchsorted(y_sorted, x_keys, side="left")
+    counts = np.searchsorted(y_sorted, x_keys, side="right") - left
+    ends = np.cumsum(counts)
+
+    x_start = 0
+    while x_start < x_keys.size:
+        done = ends[x_start - 1] if x_start else 0
+        x_stop = max(x_start + 1, int(np.searchsorted(ends, done + chunk_size, side="right")))
+        chunk_counts = counts[x_start:x_stop]
+        x_idx = np.repeat(np.arange(x_start, x_stop), chunk_counts)
+        offsets = np.repeat(left[x_start:x_stop] - np.cumsum(chunk_counts) + chunk_counts, chunk_counts)
+        yield x_idx, y_order[offsets + np.arange(x_idx.size)]
+        x_start = x_stop
+
+def _all_subset_sums(columns, p, offset=None):
+    """Returns all p-subset sums of _subset_sums at once."""
+    chunks = list(_subset_sums(columns, p, offset))
+    if not chunks:
+        return np.zeros((0, columns.shape[1]), dtype=np.uint64), np.zeros((0, p), dtype=np.int64)
+    return np.concatenate([sums for sums, _ in chunks]), np.concatenate([subsets for _, subsets in chunks])
+
+# Available decoders by name
+DECODERS = {
+    "prange": Prange,
+    "lee_brickell": LeeBrickell,
+    "stern": Stern,
+    "score_guided": ScoreGuided,
+}
+
+def decode(H, y, t, budget=100, algorithm="prange", rng=None, time_limit=None, **params):
+    """
+    Decodes y = H * m for m of Hamming weight t with the selected information-set decoder.
+
+    Parameters:
+    H: bit-packed matrix (BitMatrix or sentinel format)
+    y: integer syndrome, shape (k,)
+    t (int): Hamming weight of m
+    budget (int): maximal number of iterations
+    algorithm (str): name of a decoder in DECODERS
+    rng: np.random.Generator or seed
+    time_limit (float): maximal run time in seconds (None for no limit)
+    params: decoder parameters (p for Lee-Brickell; p and l (None: log2 of the subset count) for Stern; temperature for score-guided)
+
+    Returns:
+    DecodeResult: the support of m (None if not found), iterations, seconds and iterations/s
+    """
+    if algorithm not in DECODERS:
+        raise ValueError(f"Unknown decoder '{algorithm}', available decoders: {', '.join(DECODERS)}")
+    return DECODERS[algorithm](rng, **params).decode(H, y, t, budget, time_limit)
+
+if __name__ == "__main__":
+    from cls_generate import generate
+    from cls_uint64_tools import bitpacked_dot_row_optimized
+
+    # Compare the decoders on the same instances
+    n, k, t = 200, 100, 12
+    instances = []
+    for seed in range(5):
+        H, m = generate(n, k, t, seed=seed)
+        instances.append((H, bitpacked_dot_row_optimized(H, m)))
+
+    for algorithm in DECODERS:
+        results = [decode(H, y, t, budget=200, algorithm=algorithm, rng=0) for H, y in instances]
+        solved = sum(result.success for result in results)
+        iterations = sum(result.iterations for result in results)
+        seconds = sum(result.seconds for result in results)
+        print(f"{algorithm:<14}{solved}/{len(results)} solved, {iterations} iterations, "
+              f"{iterations / seconds:.1f} it/s, {expected_iterations(results):.1f} iterations per solution")
+    print(f"{'uniform':<14}{uniform_expected_iterations(n, k, t):.1f} expected iterations per solution")
@@ -1,6 +1,14 @@
 import math
+import queue
+import threading
+from collections import namedtuple
+
 import numpy as np
-from cls_uint64_tools import pack2uint64
+from cls_gf2 import rank_gf2, random_full_rank_gf2
+from cls_uint64_tools import pack2uint64, BitMatrix, bitpacked_dot_row_optimized, _pack_bits, _unpackbits_uint64
+
+# One generated instance of a parameter sweep (H and m in bit-packed uint64 format with sentinel bit)
+Instance = namedtuple("Instance", ["n", "k", "t", "seed", "trial", "H", "m", "y"])
 
 def extract_t(m):
     return np.unpackbits(m.view(np.uint8)).sum() - 1
@@ -13,52 +21,59 @@ def compute_y(H, m):
     y = H.dot(m)
     return y.tolist()
 
-def generate_H(n, k):
+def make_rng(seed=None):
+    """
+    Returns a np.random.Generator for seed, which can be None (fresh entropy), an int,
+    a np.random.SeedSequence or a np.random.Generator (returned unchanged).
+    """
+    return np.random.default_rng(seed)
+
+def spawn_seeds(seed, count):
+    """
+    Splits seed into count independent child seeds (np.random.SeedSequence), e.g. one
+    for each worker process, so parallel streams are reproducible and not correlated.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(count)
+
+def generate_H(n, k, method="echelon", rng=None):
     """
     Generates a random binary parity-check matrix H with n columns and k rows,
     and returns it in bit-packed uint64 format with an extra sentinel bit 1 in
     each row, which marks the end of the row and allows reconstruction of n.
-    The matrix is regenerated if it has no full row rank before packing into uint64 units.
+    Full row rank is guaranteed by construction (method "echelon": rows linearly dependent
+    on the previous rows are redrawn), or the whole matrix is regenerated until it has full
+    row rank (method "reject").
 
     Parameters:
     n (int): Number of columns (without sentinel bit)
     k (int): Number of rows
+    method (str): "echelon" or "reject"
+    rng: np.random.Generator or seed (see make_rng)
 
     Returns:
     H (ndarray): The bit-packed uint64 matrix with sentinel bits encoded in each row.
     """
+    rng = make_rng(rng)
 
-    def rank_mod2(matrix):
-        """Computes the rank of a binary matrix over GF(2) using Gaussian elimination."""
-        A = matrix.copy() % 2
-        rows, cols = A.shape
-        rank = 0
-        for col in range(cols):
-            pivot = -1
-            for row in range(rank, rows):
-                if A[row, col] == 1:
-                    pivot = row
+    match method:
+        case "echelon":
+            return random_full_rank_gf2(k, n, rng).to_sentinel()
+        case "reject":
+            while True:
+                # Generate random binary elements of the matrix
+                H_binary = rng.integers(0, 2, (k, n), dtype=np.uint8)
+                # Ensure full row rank before continuing
+                if rank_gf2(H_binary) == k:
                     break
-            if pivot == -1:
-                continue
-            A[[rank, pivot]] = A[[pivot, rank]]
-            for r in range(rows):
-                if r != rank and A[r, col] == 1:
-                    A[r] = (A[r] + A[rank]) % 2
-            rank += 1
-        return rank
 
-    while True:
-        # Generate random binary elements of the matrix
-        H_binary = np.random.randint(0, 2, (k, n), dtype=np.uint8)
-        # Ensure full row rank before continuing
-        if rank_mod2(H_binary) == k:
-            break
+            return pack2uint64(H_binary)
+        case _:
+            raise ValueError(f"Unknown generation method '{method}'")
 
-    return pack2uint64(H_binary)
 
-
-def generate_m(n, t):
+def generate_m(n, t, rng=None):
     """
     Generates a random binary vector m with Hamming weight t and returns it in bit-packed
     uint64 format with an extra sentinel bit 1 added to end, which marks it's end and allows
@@ -67,32 +82,378 @@ def generate_m(n, t):
     Parameters:
     n (int): Length of the vector (useful length)
     t (int): Hamming weight (number of ones in the vector)
+    rng: np.random.Generator or seed (see make_rng)
 
     Returns:
     m (ndarray): The bit-packed uint64 vector with sentinel bit encoded.
     """
+    rng = make_rng(rng)
 
     # Create m with t ones followed by (n-t) zeros and shuffle
     m_binary = np.concatenate((np.ones(t, dtype=np.uint8), np.zeros(n - t, dtype=np.uint8)))
-    np.random.shuffle(m_binary)
+    rng.shuffle(m_binary)
 
     return pack2uint64(m_binary)
 
 
-def generate(n, k, t):
+def generate_m_support(n, t, rng=None):
+    """
+    Generates a random binary vector m with Hamming weight t in support-index form.
+
+    Parameters:
+    n (int): Length of the vector (useful length)
+    t (int): Hamming weight (number of ones in the vector)
+    rng: np.random.Generator or seed (see make_rng)
+
+    Returns:
+    support (ndarray): Sorted indices of the t ones of m.
+    """
+    return np.sort(make_rng(rng).choice(n, t, replace=False))
+
+
+def generate_m_batch(n, t, B, rng=None, with_support=False):
+    """
+    Generates B random binary vectors m with Hamming weight t directly in bit-packed form.
+
+    The supports are sampled with Floyd's algorithm, vectorized over the batch, so the cost
+    is O(B * t) random draws (plus O(B * t^2) comparisons) instead of shuffling n entries
+    per vector, and the bits are set directly in the uint64 units.
+
+    Parameters:
+    n (int): Length of the vectors (useful length)
+    t (int): Hamming weight (number of ones in each vector)
+    B (int): Number of vectors
+    rng: np.random.Generator or seed (see make_rng)
+    with_support (bool): also return the supports
+
+    Returns:
+    M (BitMatrix): B x n matrix with one vector m per row (ready for bitpacked_dot_row_batch),
+                   or tuple (M, supports) with sorted supports of shape (B, t) if with_support
+    """
+    rng = make_rng(rng)
+
+    # Floyd's algorithm: for j = n-t .. n-1 pick r in [0, j], take j instead if r is already chosen
+    supports = np.empty((B, t), dtype=np.int64)
+    for cnt, j in enumerate(range(n - t, n)):
+        r = rng.integers(0, j + 1, size=B)
+        already_chosen = (supports[:, :cnt] == r[:, np.newaxis]).any(axis=1)
+        supports[:, cnt] = np.where(already_chosen, j, r)
+    supports.sort(axis=1)
+
+    # Set the bits of the supports in the uint64 units
+    M = BitMatrix.from_supports(supports, n)
+
+    return (M, supports) if with_support else M
+
+
+class QuasiCyclicH:
+    """
+    Quasi-cyclic parity-check matrix made of row_blocks x column_blocks circulant p x p blocks.
+
+    Only the first row of each circulant block is stored (bit-packed uint64), row i of a block
+    is its first row cyclically shifted right by i. The syndrome and column score kernels work
+    on the first rows directly (cyclic index shifts and FFT cross-correlation over the length p
+    blocks), so the full k x n matrix is never materialized.
+    """
+    __slots__ = ("first_rows", "p", "_first_columns", "_first_columns_fft")
+
+    def __init__(self, first_rows, p):
+        self.first_rows = np.asarray(first_rows, dtype=np.uint64)
+        self.p = int(p)
+        self._first_columns = None
+        self._first_columns_fft = None
+
+    @property
+    def row_blocks(self):
+        return self.first_rows.shape[0]
+
+    @property
+    def column_blocks(self):
+        return self.first_rows.shape[1]
+
+    @property
+    def n(self):
+        return self.column_blocks * self.p
+
+    @property
+    def k(self):
+        return self.row_blocks * self.p
+
+    def first_columns(self):
+        """Returns the first column of every block in binary format, shape (row_blocks, column_blocks, p)."""
+        if self._first_columns is None:
+            first_rows = _unpackbits_uint64(self.first_rows)[..., :self.p]
+            # Column 0 of a circulant block: c[i] = h[-i mod p]
+            self._first_columns = np.roll(first_rows[..., ::-1], 1, axis=-1)
+        return self._first_columns
+
+    def syndrome(self, support):
+        """
+        Computes y = H * m for a vector m given by the indices of its set bits (see BitVector.support).
+        Column j of a circulant block is its first column cyclically shifted down by j, so the cost
+        is O(t * k).
+
+        Parameters:
+        support: indices of the set bits of m, shape (t,)
+
+        Returns:
+        y (ndarray): dtype=np.uint64, shape=(k,)
+        """
+        blocks, offsets = np.divmod(np.asarray(support, dtype=np.int64), self.p)
+        rows = (np.arange(self.p)[np.newaxis, :] - offsets[:, np.newaxis]) % self.p
+        y = self.first_columns()[:, blocks[:, np.newaxis], rows].sum(axis=1, dtype=np.uint64)
+        return y.reshape(-1)
+
+    def column_scores(self, y):
+        """
+        Computes Phi = H^T * y. For each block, the scores are the cyclic cross-correlation of
+        the block's part of y with the block's first column, computed with FFT in O(p log p).
+
+        Parameters:
+        y: integer vector, shape (k,)
+
+        Returns:
+        Phi (ndarray): dtype=np.uint64, shape=(n,)
+        """
+        if self._first_columns_fft is None:
+            self._first_columns_fft = np.conj(np.fft.rfft(self.first_columns(), axis=-1))
+
+        y_fft = np.fft.rfft(np.asarray(y, dtype=np.float64).reshape(self.row_blocks, self.p), axis=-1)
+        phi_fft = (y_fft[:, np.newaxis, :] * self._first_columns_fft).sum(axis=0)
+        phi = np.fft.irfft(phi_fft, n=self.p, axis=-1)
+        return np.rint(phi).astype(np.uint64).reshape(-1)
+
+    def to_bitmatrix(self):
+        """Materializes the full matrix as a BitMatrix (for small sizes and checks only)."""
+        first_rows = _unpackbits_uint64(self.first_rows)[..., :self.p]
+        shifts = (np.arange(self.p)[np.newaxis, :] - np.arange(self.p)[:, np.newaxis]) % self.p
+        # Block (R, C) row i: h_RC[(j - i) mod p]
+        blocks = first_rows[:, :, shifts]
+        H_bits = blocks.transpose(0, 2, 1, 3).reshape(self.k, self.n)
+        return BitMatrix.from_bits(H_bits)
+
+
+def generate_H_qc(p, row_blocks, column_blocks, rng=None):
+    """
+    Generates a random quasi-cyclic parity-check matrix with k = row_blocks * p rows and
+    n = column_blocks * p columns, storing only the first row of each circulant block.
+    Full row rank is not enforced.
+
+    Parameters:
+    p (int): Size of the circulant blocks
+    row_blocks (int): Number of block rows
+    column_blocks (int): Number of block columns
+    rng: np.random.Generator or seed (see make_rng)
+
+    Returns:
+    H (QuasiCyclicH): The quasi-cyclic matrix.
+    """
+    first_rows = make_rng(rng).integers(0, 2, (row_blocks, column_blocks, p), dtype=np.uint8)
+    return QuasiCyclicH(_pack_bits(first_rows), p)
+
+
+class SparseH:
+    """
+    Sparse (LDPC-style) binary parity-check matrix stored as index arrays in both
+    CSR (row_ptr, col_idx) and CSC (col_ptr, row_idx) form, so the syndrome and
+    column score kernels cost O(nnz) (or O(t * column weight)) instead of O(k * n / 64).
+    """
+    __slots__ = ("n", "k", "row_ptr", "col_idx", "col_ptr", "row_idx")
+
+    def __init__(self, n, k, row_ptr, col_idx):
+        self.n, self.k = int(n), int(k)
+        self.row_ptr = np.asarray(row_ptr, dtype=np.int64)
+        self.col_idx = np.asarray(col_idx, dtype=np.int64)
+
+        # CSC form: entries sorted by column (stable, so rows stay sorted within a column)
+        order = np.argsort(self.col_idx, kind="stable")
+        self.row_idx = self._entry_rows()[order]
+        self.col_ptr = np.concatenate(([0], np.cumsum(np.bincount(self.col_idx, minlength=self.n))))
+
+    @property
+    def nnz(self):
+        return self.col_idx.shape[0]
+
+    def _entry_rows(self):
+        """Returns the row of each CSR entry."""
+        return np.repeat(np.arange(self.k), np.diff(self.row_ptr))
+
+    def syndrome(self, support):
+        """
+        Computes y = H * m for a vector m given by the indices of its set bits,
+        by counting the rows of the selected columns (O(t * column weight)).
+
+        Parameters:
+        support: indices of the set bits of m, shape (t,)
+
+        Returns:
+        y (ndarray): dtype=np.uint64, shape=(k,)
+        """
+        support = np.asarray(support, dtype=np.int64)
+        starts, ends = self.col_ptr[support], self.col_ptr[support + 1]
+        lengths = ends - starts
+
+        # Positions of all entries of the selected columns in row_idx
+        entry_idx = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.bincount(self.row_idx[entry_idx], minlength=self.k).astype(np.uint64)
+
+    def column_scores(self, y):
+        """
+        Computes Phi = H^T * y in O(nnz).
+
+        Parameters:
+        y: integer vector, shape (k,)
+
+        Returns:
+        Phi (ndarray): dtype=np.uint64, shape=(n,)
+        """
+        entry_values = np.asarray(y, dtype=np.int64)[self._entry_rows()]
+        return np.bincount(self.col_idx, weights=entry_values, minlength=self.n).astype(np.uint64)
+
+    def is_solution(self, support, y):
+        """Returns True if the vector given by support has syndrome y."""
+        return bool((self.syndrome(support) == np.asarray(y)).all())
+
+    def to_bitmatrix(self):
+        """Materializes the matrix as a BitMatrix (for small sizes and checks only)."""
+        H_bits = np.zeros((self.k, self.n), dtype=np.uint8)
+        H_bits[self._entry_rows(), self.col_idx] = 1
+        return BitMatrix.from_bits(H_bits)
+
+
+def generate_H_sparse(n, k, row_weight, column_weight, rng=None):
+    """
+    Generates a random regular sparse parity-check matrix (Gallager construction) with
+    row_weight ones in each row and column_weight ones in each column.
+
+    The rows form column_weight bands of n / row_weight rows. In the first band, row i covers
+    columns i * row_weight .. (i + 1) * row_weight - 1; the other bands are random column
+    permutations of the first one. Full row rank is not enforced.
+
+    Parameters:
+    n (int): Number of columns
+    k (int): Number of rows (k = n * column_weight / row_weight)
+    row_weight (int): Number of ones in each row
+    column_weight (int): Number of ones in each column
+    rng: np.random.Generator or seed (see make_rng)
+
+    Returns:
+    H (SparseH): The sparse matrix.
+    """
+    if n % row_weight != 0 or k * row_weight != n * column_weight:
+        raise ValueError("Regular sparse matrix needs n divisible by row_weight and k * row_weight = n * column_weight.")
+
+    rng = make_rng(rng)
+
+    # Columns of each band, row by row (the first band is not permuted)
+    bands = [np.arange(n)] + [rng.permutation(n) for _ in range(column_weight - 1)]
+    col_idx = np.sort(np.concatenate(bands).reshape(k, row_weight), axis=1).reshape(-1)
+    row_ptr = np.arange(0, k * row_weight + 1, row_weight)
+
+    return SparseH(n, k, row_ptr, col_idx)
+
+
+def generate(n, k, t, seed=None):
     """
     Generates a parity-check matrix H and a binary vector m.
+    H and m are drawn from two independent child streams of seed,
+    so the same (H, m) can be regenerated from the seed alone.
 
     Parameters:
     n (int): Number of columns of H (and length of m)
     k (int): Number of rows of H
     t (int): Hamming weight of m
+    seed: int or np.random.SeedSequence (None for fresh entropy)
 
     Returns:
     tuple: (H, m) where H is the generated matrix and m is the generated vector
     """
+    H_seed, m_seed = spawn_seeds(seed, 2)
 
-    H = generate_H(n, k)
-    m = generate_m(n, t)
+    H = generate_H(n, k, rng=make_rng(H_seed))
+    m = generate_m(n, t, rng=make_rng(m_seed))
 
     return H, m
+
+
+def generate_instances(n_values, k_values, t_values, seeds=(0,), trials=1, prefetch=True):
+    """
+    Lazily generates (H, m, y) instances over a grid of parameters.
+
+    H is generated once for each (seed, n, k) and reused for every t and trial, so only
+    one H is kept in memory at a time. Every H and m is drawn from its own child stream
+    of seed, so any instance can be regenerated from (seed, n, k, t, trial) alone.
+    Combinations with k > n (no full row rank) are skipped.
+
+    Parameters:
+    n_values, k_values, t_values: iterables of n, k and t values
+    seeds: iterable of seeds (ints), one H per seed and (n, k)
+    trials (int): number of vectors m for each (seed, n, k, t)
+    prefetch (bool): generate the next instance in a background thread while
+                     the current one is processed
+
+    Yields:
+    Instance: namedtuple (n, k, t, seed, trial, H, m, y)
+    """
+    instances = _generate_instances(tuple(n_values), tuple(k_values), tuple(t_values), tuple(seeds), trials)
+    if prefetch:
+        instances = _prefetch(instances)
+    yield from instances
+
+
+def _generate_instances(n_values, k_values, t_values, seeds, trials):
+    """Generates the instances of generate_instances in order."""
+    for seed in seeds:
+        for n in n_values:
+            for k in k_values:
+                if k > n:
+                    continue
+                H = generate_H(n, k, rng=make_rng(np.random.SeedSequence([seed, n, k])))
+
+                for t in t_values:
+                    m_seeds = spawn_seeds(np.random.SeedSequence([seed, n, k, t]), trials)
+                    for trial in range(trials):
+                        m = generate_m(n, t, rng=make_rng(m_seeds[trial]))
+                        y = bitpacked_dot_row_optimized(H, m)
+                        yield Instance(n, k, t, seed, trial, H, m, y)
+
+
+def _prefetch(iterator, depth=1):
+    """
+    Runs iterator in a background thread, keeping up to depth items ready.
+    Exceptions of the iterator are raised in the consumer.
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(entry):
+        # Wait for free space, but give up if the consumer has stopped
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        try:
+            for item in iterator:
+                if not put((True, item)):
+                    return
+            put((False, None))
+        except Exception as error:
+            put((False, error))
+
+    threading.Thread(target=producer, daemon=True).start()
+
+    try:
+        while True:
+            has_item, item = items.get()
+            if not has_item:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        stop.set()
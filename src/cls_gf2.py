@@ -0,0 +1,262 @@
+import math
+
+import numpy as np
+
+from cls_uint64_tools import BitMatrix, BitVector, permute_columns, _unpackbits_uint64
+
+# Number of columns eliminated together with one lookup table (Method of Four Russians).
+# Must divide 64, so the columns of a block are always in the same uint64 unit.
+M4RI_BLOCK_SIZE = 8
+
+def rank_gf2(matrix):
+    """
+    Computes the rank of a binary matrix over GF(2).
+
+    Parameters:
+    matrix: BitMatrix, or binary matrix (any integer dtype, taken modulo 2)
+
+    Returns:
+    rank (int): rank of the matrix over GF(2)
+    """
+    H = _as_packed(matrix)
+    return len(_m4ri_eliminate(H.data.copy(), H.n, full=False))
+
+def rref_gf2(matrix):
+    """
+    Computes the reduced row echelon form of a binary matrix over GF(2).
+
+    Parameters:
+    matrix: BitMatrix, or binary matrix (any integer dtype, taken modulo 2)
+
+    Returns:
+    tuple: (R, pivots) where R is the reduced row echelon form as a BitMatrix (zero rows
+           at the bottom) and pivots are the pivot columns of the first len(pivots) rows
+    """
+    H = _as_packed(matrix)
+    data = H.data.copy()
+    pivots = _m4ri_eliminate(data, H.n, full=True)
+    return BitMatrix(data, H.n), np.array(pivots, dtype=np.int64)
+
+def systematic_form_gf2(matrix):
+    """
+    Converts a binary matrix into systematic form [I | A] over GF(2) using row operations
+    and a column permutation which moves the pivot columns to the front.
+
+    Parameters:
+    matrix: BitMatrix, or binary matrix (any integer dtype, taken modulo 2)
+
+    Returns:
+    tuple: (H_sys, permutation) where H_sys is the systematic form as a BitMatrix with
+           rank rows (zero rows are dropped) and H_sys = (U * H)[:, permutation]
+    """
+    R, pivots = rref_gf2(matrix)
+    non_pivots = np.setdiff1d(np.arange(R.n), pivots)
+    permutation = np.concatenate((pivots, non_pivots))
+    return permute_columns(R[:len(pivots)], permutation), permutation
+
+def solve_gf2(matrix, s):
+    """
+    Solves H * x = s over GF(2).
+
+    Parameters:
+    matrix: BitMatrix, or binary matrix (any integer dtype, taken modulo 2)
+    s: binary vector (any integer dtype, taken modulo 2), shape (k,)
+
+    Returns:
+    x (ndarray): binary uint8 solution with zeros at all non-pivot columns,
+                 or None if the system has no solution
+    """
+    H = _as_packed(matrix)
+
+    # Augment H with s as column n (BitMatrix data always has room for it)
+    data = H.data.copy()
+    s_bits = (np.asarray(s, dtype=np.int64) & 1).astype(np.uint64)
+    data[:, H.n // 64] |= s_bits << np.uint64(H.n % 64)
+
+    # Pivots are taken from the columns of H only
+    pivots = _m4ri_eliminate(data, H.n, full=True)
+    s_reduced = _unpackbits_uint64(data[:, H.n // 64:H.n // 64 + 1])[:, H.n % 64]
+
+    if s_reduced[len(pivots):].any():
+        return None
+
+    x = np.zeros(H.n, dtype=np.uint8)
+    x[pivots] = s_reduced[:len(pivots)]
+    return x
+
+class EchelonBasis:
+    """
+    Incrementally built basis of bit-packed GF(2) row vectors in reduced echelon form:
+    every basis row has a 1 in its pivot column and 0 in the pivot columns of all other
+    basis rows. A new row is reduced against the whole basis with one XOR reduction
+    and is inserted only if it is linearly independent of the rows already inserted.
+    """
+    __slots__ = ("rows", "pivot_units", "pivot_bits", "rank")
+
+    def __init__(self, n, max_rank):
+        self.rows = np.zeros((max_rank, math.ceil((n + 1) / 64)), dtype=np.uint64)
+        self.pivot_units = np.zeros(max_rank, dtype=np.int64)
+        self.pivot_bits = np.zeros(max_rank, dtype=np.uint64)
+        self.rank = 0
+
+    def reduce(self, row):
+        """Returns row reduced by the basis (zero if row is in the span of the basis)."""
+        basis = self.rows[:self.rank]
+        has_pivot = (row[self.pivot_units[:self.rank]] >> self.pivot_bits[:self.rank]) & np.uint64(1)
+        return row ^ np.bitwise_xor.reduce(basis[has_pivot.astype(bool)], axis=0)
+
+    def insert(self, row):
+        """
+        Inserts a bit-packed row (without sentinel bit) into the basis.
+
+        Returns:
+        bool: True if the row was linearly independent and has been inserted
+        """
+        reduced = self.reduce(row)
+        nonzero_units = np.flatnonzero(reduced)
+        if nonzero_units.size == 0:
+            return False
+
+        # Pivot of the new row is its lowest set bit
+        pivot_unit = nonzero_units[0]
+        pivot_word = int(reduced[pivot_unit])
+        pivot_bit = np.uint64((pivot_word & -pivot_word).bit_length() - 1)
+
+        # Clear the new pivot column in the other basis rows
+        basis = self.rows[:self.rank]
+        has_bit = ((basis[:, pivot_unit] >> pivot_bit) & np.uint64(1)).astype(bool)
+        basis[has_bit] ^= reduced
+
+        self.rows[self.rank] = reduced
+        self.pivot_units[self.rank] = pivot_unit
+        self.pivot_bits[self.rank] = pivot_bit
+        self.rank += 1
+        return True
+
+def random_full_rank_gf2(k, n, rng=None):
+    """
+    Generates a uniformly distributed random binary k x n matrix with full row rank.
+
+    The rows are drawn as random uint64 units and inserted into an EchelonBasis one
+    by one, and only rows which depend on the previous rows are drawn again, so no
+    elimination pass over the whole matrix is ever wasted.
+
+    Parameters:
+    k (int): Number of rows
+    n (int): Number of columns (k <= n)
+    rng (np.random.Generator): source of random bits (a fresh generator if None)
+
+    Returns:
+    H (BitMatrix): random matrix of rank k
+    """
+    rng = np.random.default_rng(rng)
+
+    if k > n:
+        raise ValueError("A matrix with full row rank cannot have more rows (k) than columns (n).")
+
+    # Mask of the n useful bits in the uint64 units of a row
+    unit_masks = BitVector.from_bits(np.ones(n, dtype=np.uint8)).data
+    num_units = unit_masks.shape[0]
+
+    def random_rows(count):
+        return rng.integers(0, 2 ** 64, size=(count, num_units), dtype=np.uint64) & unit_masks
+
+    rows = random_rows(k)
+    basis = EchelonBasis(n, k)
+    for row_cnt in range(k):
+        # Redraw the row until it is independent of the previous rows
+        while not basis.insert(rows[row_cnt]):
+            rows[row_cnt] = random_rows(1)[0]
+
+    return BitMatrix(rows, n)
+
+def _as_packed(matrix):
+    """Returns the matrix as a BitMatrix, packing binary matrices if needed."""
+    if isinstance(matrix, BitMatrix):
+        return matrix
+    return BitMatrix.from_bits(np.asarray(matrix) % 2)
+
+def _m4ri_eliminate(data, num_columns, full=True):
+    """
+    Gaussian elimination over GF(2) on bit-packed rows (in place) using the Method of Four Russians.
+
+    Columns are processed in blocks of M4RI_BLOCK_SIZE. For each block, up to M4RI_BLOCK_SIZE pivot
+    rows are found and reduced against each other, then a table with all 2^r XOR combinations of
+    the r pivot rows is built. Every other row is cleared in all pivot columns of the block with
+    a single XOR of the table entry selected by its bits in these columns, so the full-width row
+    operations are done once per block instead of once per column.
+
+    Parameters:
+    data: bit-packed uint64 matrix without sentinel bits, shape (rows, units), modified in place
+    num_columns (int): pivots are searched in columns 0 .. num_columns - 1
+    full (bool): also clear pivot columns above the pivots (reduced row echelon form);
+                 if False, only the rows below are cleared (row echelon form)
+
+    Returns:
+    pivots (list): pivot column of each of the first len(pivots) rows
+    """
+    num_rows = data.shape[0]
+    rank = 0
+    pivots = []
+
+    for block_start in range(0, num_columns, M4RI_BLOCK_SIZE):
+        if rank == num_rows:
+            break
+
+        unit = block_start // 64
+        block_rank = rank
+        block_bits = []
+
+        for col in range(block_start, min(block_start + M4RI_BLOCK_SIZE, num_columns)):
+            if rank == num_rows:
+                break
+            bit = np.uint64(col % 64)
+
+            # Block unit of the remaining rows, reduced by the pivots already found in this block
+            # (pivot rows are reduced against each other, so one pass over them is enough)
+            words = data[rank:, unit]
+            words_reduced = words.copy()
+            for pivot_row, pivot_bit in zip(range(block_rank, rank), block_bits):
+                has_bit = ((words >> pivot_bit) & np.uint64(1)).astype(bool)
+                words_reduced[has_bit] ^= data[pivot_row, unit]
+
+            candidates = np.flatnonzero((words_reduced >> bit) & np.uint64(1))
+            if candidates.size == 0:
+                continue
+
+            # Move the new pivot row into place and reduce it by the previous pivots of the block
+            pivot_row = rank + candidates[0]
+            data[[rank, pivot_row]] = data[[pivot_row, rank]]
+            for prev_row, prev_bit in zip(range(block_rank, rank), block_bits):
+                if (data[rank, unit] >> prev_bit) & np.uint64(1):
+                    data[rank] ^= data[prev_row]
+
+            # Clear the new pivot column in the previous pivots of the block
+            for prev_row in range(block_rank, rank):
+                if (data[prev_row, unit] >> bit) & np.uint64(1):
+                    data[prev_row] ^= data[rank]
+
+            pivots.append(col)
+            block_bits.append(bit)
+            rank += 1
+
+        if not block_bits:
+            continue
+
+        # Table of all XOR combinations of the pivot rows of the block
+        table = np.zeros((1 << len(block_bits), data.shape[1]), dtype=np.uint64)
+        for pivot_idx in range(len(block_bits)):
+            table[1 << pivot_idx:2 << pivot_idx] = table[:1 << pivot_idx] ^ data[block_rank + pivot_idx]
+
+        # Clear the pivot columns of the block in all other rows with one table lookup per row
+        target_rows = np.arange(rank, num_rows)
+        if full:
+            target_rows = np.concatenate((np.arange(block_rank), target_rows))
+
+        words = data[target_rows, unit]
+        table_idx = np.zeros(target_rows.size, dtype=np.int64)
+        for pivot_idx, pivot_bit in enumerate(block_bits):
+            table_idx |= ((words >> pivot_bit) & np.uint64(1)).astype(np.int64) << pivot_idx
+        data[target_rows] ^= table[table_idx]
+
+    return pivots
@@ -1,33 +1,434 @@
 import numpy as np
 from cls_generate import generate, compute_y
 from cls_uint64_tools import packed_uint64_length, bitpacked_dot_row_readable, bitpacked_dot_row_optimized, \
-    bitpacked_dot_column_optimized, pack2uint64
+    bitpacked_dot_column_optimized, BitMatrix, BitVector, IncrementalSyndrome, as_bitmatrix, \
+    verify_row, verify_row_batch, popcount_uint64
 
 # Define size of random matrix H (n columns and k rows)
 n, k, t = 200, 100, 2
 
-def calculate_m(H, y, t):
-    useful_columns = packed_uint64_length(H[0])
+def select_top_t(score, t):
+    """
+    Selects the t columns with the highest score in O(n) using np.partition.
 
-    # Calculate Phi: For each column of H, compute dot product with y.
-    phi = bitpacked_dot_column_optimized(H, y, useful_columns,True)
+    Ties at the t-th highest score are broken by lower column index (as a stable
+    descending sort would do), and the whole tie group is returned as well.
 
-    # Create score vector by sorting Phi by value
-    score = sorted(phi, key=lambda phi: phi[1], reverse=True)
+    Parameters:
+    score: score of each column, shape (n,)
+    t (int): number of columns to select (all columns if t > n)
 
-    # Generate new "m" vector based on Score_sorted
-    m = [0] * useful_columns
-    for idx, (cnt, val) in enumerate(score[:t]):
-        m[cnt] = 1
+    Returns:
+    tuple: (support, ties) where support holds the sorted indices of the selected
+           columns and ties the indices of all columns scoring exactly the t-th
+           highest score
+    """
+    score = np.asarray(score)
+    t = min(t, score.size)
+    if t == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
 
-    return pack2uint64(np.array(m))
+    # The t-th highest score
+    cutoff = np.partition(score, score.size - t)[score.size - t]
 
-def IsSolution(H, y, m):
-    y_new = bitpacked_dot_row_optimized(H, m)
-    if (y == y_new).all():
-        return True
+    above = np.flatnonzero(score > cutoff)
+    ties = np.flatnonzero(score == cutoff)
+    support = np.sort(np.concatenate((above, ties[:t - above.size])))
+
+    return support, ties
+
+def complement_score(phi, column_weights, y, t):
+    """
+    Computes Score = Phi + Phi_c in closed form, where Phi_c = H_c^T * y_c is the column dot product
+    of the complementary matrix H_c = 1 - H and y_c = t - y. As
+    Phi_c[j] = sum(t - y_i) - sum(H_ij * (t - y_i)) = k * t - sum(y) - t * w_j + Phi[j],
+    neither H_c nor y_c is needed:
+
+        Score[j] = 2 * Phi[j] - t * w_j + k * t - sum(y)
+
+    Parameters:
+    phi: Phi = H^T * y, shape (n,) (or (B, n) with y of shape (B, k))
+    column_weights: number of ones in each column of H (w), shape (n,)
+    y: syndrome, shape (k,) (or (B, k))
+    t (int): Hamming weight
+
+    Returns:
+    Score (ndarray): dtype=np.int64, same shape as phi
+    """
+    y = np.asarray(y, dtype=np.int64)
+    k = y.shape[-1]
+    offset = k * t - y.sum(axis=-1, keepdims=True)
+    return (2 * np.asarray(phi, dtype=np.int64) - t * np.asarray(column_weights, dtype=np.int64)
+            + offset).reshape(np.shape(phi))
+
+def calculate_score(H, y, t):
+    """
+    Computes Score = Phi + Phi_c of every column of bit-packed H (see complement_score)
+    using one Phi computation and the cached column weights of H. The cache lives on the
+    BitMatrix, so pass the same BitMatrix to repeated calls (sentinel format H is converted
+    on every call, which costs a full transpose).
+    """
+    H = as_bitmatrix(H)
+    phi = bitpacked_dot_column_optimized(H, y)
+    return complement_score(phi, H.column_weights(), y, t)
+
+def prune_columns(H, y, t):
+    """
+    Integer-syndrome constraint propagation: as y = H * m over the integers, every row i
+    holds exactly y_i support columns and the other t - y_i are outside the row. With packed
+    column masks of the columns which can still be in the support (alive) and which must be
+    in it (forced), the following rules are applied to all rows at once until nothing changes:
+
+    - the forced columns of row i already give y_i (e.g. y_i = 0): the other columns of row i
+      are excluded
+    - the forced columns outside row i already give t - y_i (e.g. y_i = t): the other columns
+      outside row i are excluded
+    - row i has exactly y_i alive columns: all of them are forced
+    - exactly t columns are alive: all of them are forced, and if t columns are forced,
+      all other columns are excluded
+
+    Each pass costs a few AND + popcount passes over the packed H. For small t many rows
+    have y_i = 0, so the candidate columns shrink sharply before any scoring.
+
+    Parameters:
+    H: bit-packed matrix (BitMatrix or sentinel format)
+    y: syndrome, shape (k,)
+    t (int): Hamming weight
+
+    Returns:
+    tuple: (alive, forced) BitVectors of the columns which can be and which must be in the
+           support (fewer than t alive columns mean that y has no solution of weight t)
+    """
+    H = as_bitmatrix(H)
+    y = np.asarray(y, dtype=np.int64)
+    rows = H.data
+
+    alive = BitVector.from_bits(np.ones(H.n, dtype=np.uint8)).data
+    forced = np.zeros_like(alive)
+
+    while True:
+        candidates_in_row = popcount_uint64(rows & alive).sum(axis=1)
+        if forced.any():
+            forced_in_row = popcount_uint64(rows & forced).sum(axis=1)
+            forced_outside_row = popcount_uint64(forced).sum() - forced_in_row
+        else:
+            forced_in_row = forced_outside_row = np.zeros(H.k, dtype=np.int64)
+
+        new_alive = alive.copy()
+        full = forced_in_row == y
+        if full.any():
+            new_alive &= ~(np.bitwise_or.reduce(rows[full], axis=0) & ~forced)
+        closed = forced_outside_row == t - y
+        if closed.any():
+            new_alive &= np.bitwise_and.reduce(rows[closed] | forced, axis=0)
+
+        new_forced = forced.copy()
+        tight = candidates_in_row == y
+        if tight.any():
+            new_forced |= np.bitwise_or.reduce(rows[tight], axis=0) & new_alive
+
+        num_alive = popcount_uint64(new_alive).sum()
+        num_forced = popcount_uint64(new_forced).sum()
+        if num_alive == t:
+            new_forced = new_alive.copy()
+        elif num_forced == t:
+            new_alive = new_forced.copy()
+
+        if (new_alive == alive).all() and (new_forced == forced).all():
+            break
+        alive, forced = new_alive, new_forced
+        if num_alive < t or num_forced > t:
+            # Contradiction: y has no solution of weight t
+            break
+
+    return BitVector(alive, H.n), BitVector(forced, H.n)
+
+def calculate_m(H, y, t, complement=False, refine=False, prune=False):
+    # Convert once, so all stages share the cached columns and column weights of H
+    # (pass a BitMatrix to keep them between calls)
+    H = as_bitmatrix(H)
+    useful_columns = H.n
+
+    alive_columns = forced_columns = None
+    if prune:
+        alive, forced = prune_columns(H, y, t)
+        alive_columns, forced_columns = alive.support(), forced.support()
+        if forced_columns.size == t:
+            # The support is settled by the constraints alone, no scoring needed
+            return BitVector.from_support(forced_columns, useful_columns).to_sentinel()
+        if alive_columns.size < t or alive_columns.size == H.n:
+            # Nothing pruned (or y is inconsistent): plain scoring
+            alive_columns = None
+
+    if complement:
+        # Calculate Score: Phi + Phi_c of each column
+        phi = calculate_score(H, y, t)
     else:
-        return False
+        # Calculate Phi: For each column of H, compute dot product with y.
+        phi = bitpacked_dot_column_optimized(H, y, useful_columns)
+
+    if alive_columns is not None:
+        # Excluded columns rank below and forced columns above every real score
+        phi = np.asarray(phi, dtype=np.int64)
+        lowest, highest = phi.min() - 1, phi.max() + 1
+        dead = np.ones(H.n, dtype=bool)
+        dead[alive_columns] = False
+        phi[dead] = lowest
+        phi[forced_columns] = highest
+
+    # Select the t columns with highest Phi
+    support, _ = select_top_t(phi, t)
+
+    if refine:
+        # Repair a near-miss top t selection by greedy swaps (kept only if they lead to a solution)
+        refined, _ = refine_m(H, y, t, support)
+        if refined is not None:
+            support = refined
+
+    # Generate new "m" vector with ones at the selected columns
+    return BitVector.from_support(support, useful_columns).to_sentinel()
+
+def enumerate_ties(H, y, t, score, budget=10000):
+    """
+    Tries every way to fill the free slots of the top t selection from the tie group at the
+    cutoff score, instead of breaking ties arbitrarily. The columns scoring above the cutoff
+    are kept, the combinations of tied columns are enumerated in revolving door order (a Gray
+    code in which consecutive candidates differ by a single swap), and every candidate is
+    checked with an incremental syndrome at the cost of one swap. The search stops at the
+    first solution.
+
+    Parameters:
+    H: bit-packed matrix (BitMatrix or sentinel format)
+    y: syndrome, shape (k,)
+    t (int): Hamming weight
+    score: score of each column (e.g. Phi, or Phi + Phi_c), shape (n,)
+    budget (int): maximal number of candidates checked
+
+    Returns:
+    tuple: (support, checked) where support holds the sorted indices of the solution
+           (None if not found within the budget) and checked is the number of candidates checked
+    """
+    H = as_bitmatrix(H)
+    support, ties = select_top_t(score, t)
+
+    # Columns above the cutoff are in every candidate, the other slots are filled from the ties
+    tied_selection = np.intersect1d(support, ties)
+    syndrome = IncrementalSyndrome(H, y, support)
+    checked = 1
+    if syndrome.is_solution():
+        return support, checked
+
+    # The top t selection holds the first tied_selection.size ties, which is where the order starts
+    for out_pos, in_pos in _revolving_door_swaps(ties.size, tied_selection.size):
+        if checked >= budget:
+            break
+        syndrome.swap(ties[out_pos], ties[in_pos])
+        checked += 1
+
+        if syndrome.is_solution():
+            return syndrome.support(), checked
+
+    return None, checked
+
+def _revolving_door_swaps(n, r):
+    """
+    Enumerates all r-subsets of range(n) in revolving door order (Knuth, TAOCP 7.2.1.3,
+    Algorithm R), starting from {0, ..., r - 1}. Yields the swap (out, in) which turns
+    each subset into the next one, so every subset is visited exactly once.
+    """
+    if r == 0 or r >= n:
+        return
+
+    # c[0 .. r - 1] is the current subset in increasing order, c[r] = n is a sentinel
+    c = list(range(r)) + [n]
+    while True:
+        # Easy case: move the smallest element by one
+        if r % 2 == 1 and c[0] + 1 < c[1]:
+            yield c[0], c[0] + 1
+            c[0] += 1
+            continue
+        if r % 2 == 0 and c[0] > 0:
+            yield c[0], c[0] - 1
+            c[0] -= 1
+            continue
+
+        # Find the lowest element j which can be decreased (to c[j - 1]) or increased
+        j, decrease = 1, r % 2 == 1
+        while True:
+            if j >= r:
+                return
+            if decrease and c[j] > j:
+                yield c[j], j - 1
+                c[j], c[j - 1] = c[j - 1], j - 1
+                break
+            if not decrease and c[j] + 1 < c[j + 1]:
+                yield c[j - 1], c[j] + 1
+                c[j - 1], c[j] = c[j], c[j] + 1
+                break
+            j, decrease = j + 1, not decrease
+
+def refine_m(H, y, t, support, max_swaps=None):
+    """
+    Bit-flipping refinement of a candidate support: repeatedly removes the support column whose
+    removal reduces the residual distance |y - H * m|_1 the most, and adds the column outside the
+    support which reduces it the most afterwards. A swap is kept only if the distance decreases,
+    so the search ends at a solution or at a local minimum.
+
+    Removing column j increases the residual r = y - H * m by 1 on the rows of j, which changes
+    the distance by w_j - 2 * G_neg[j], and adding it changes the distance by w_j - 2 * G_pos[j],
+    where G_pos = H^T * [r > 0] and G_neg = H^T * [r < 0] count the rows of each column with
+    positive and negative residual. Both counts are updated incrementally: a flip changes r only
+    on the rows of one column, and only the rows whose residual sign changes add or subtract
+    their row of H, so Phi is never recomputed with bitpacked_dot_column_optimized.
+
+    Parameters:
+    H: bit-packed matrix (BitMatrix or sentinel format)
+    y: syndrome, shape (k,)
+    t (int): Hamming weight
+    support: indices of the t columns of the starting candidate (e.g. the top t selection)
+    max_swaps (int): maximal number of swaps (t * k if None)
+
+    Returns:
+    tuple: (support, swaps) where support holds the sorted indices of the solution
+           (None if the search ended in a local minimum or hit max_swaps) and swaps is
+           the number of swaps made
+    """
+    H = as_bitmatrix(H)
+    if max_swaps is None:
+        max_swaps = t * H.k
+
+    syndrome = IncrementalSyndrome(H, y, support)
+    H_bits = H.to_bits()
+    weights = H.column_weights()
+    residual = syndrome.residual()
+    positive = (residual > 0).astype(np.int64) @ H_bits
+    negative = (residual < 0).astype(np.int64) @ H_bits
+    distance = int(np.abs(residual).sum())
+
+    def flip(idx):
+        rows = np.flatnonzero(H.column_bits(idx))
+        positive_before = (residual[rows] > 0).astype(np.int64)
+        negative_before = (residual[rows] < 0).astype(np.int64)
+
+        # r changes by -1 on the rows of an added column, by +1 on the rows of a removed one
+        residual[rows] += 1 if syndrome.in_support[idx] else -1
+        syndrome.flip(idx)
+
+        positive_change = (residual[rows] > 0) - positive_before
+        negative_change = (residual[rows] < 0) - negative_before
+        changed = np.flatnonzero(positive_change | negative_change)
+        positive[:] += positive_change[changed] @ H_bits[rows[changed]]
+        negative[:] += negative_change[changed] @ H_bits[rows[changed]]
+
+    swaps = 0
+    excluded = np.iinfo(np.int64).max
+    while not syndrome.is_solution() and swaps < max_swaps:
+        out_idx = int(np.argmin(np.where(syndrome.in_support, weights - 2 * negative, excluded)))
+        flip(out_idx)
+
+        in_delta = np.where(syndrome.in_support, excluded, weights - 2 * positive)
+        in_delta[out_idx] = excluded
+        in_idx = int(np.argmin(in_delta))
+        flip(in_idx)
+
+        new_distance = int(np.abs(residual).sum())
+        if new_distance >= distance:
+            # Local minimum: undo the swap
+            flip(in_idx)
+            flip(out_idx)
+            break
+        distance = new_distance
+        swaps += 1
+
+    return (syndrome.support() if syndrome.is_solution() else None), swaps
+
+def IsSolution(H, y, m):
+    # Row blocks are checked one by one, stopping at the first mismatch
+    return verify_row(H, y, m)
+
+def IsSolutionBatch(H, y, M, early_exit=True):
+    """
+    Checks every row of the bit-packed candidate matrix M against y
+    (one syndrome for all candidates, or one syndrome per candidate, shape (B, k)).
+    Rejected candidates are dropped after each row block (see verify_row_batch);
+    early_exit=False checks all rows at once with BLAS, which is faster when most
+    candidates are solutions.
+    Returns a boolean vector, True where the candidate reproduces y.
+    """
+    return verify_row_batch(H, y, M, early_exit)
+
+def select_top_t_batch(scores, t):
+    """
+    Row-wise version of select_top_t: selects the t columns with the highest score
+    in every row of scores at once (ties broken by lower column index).
+
+    Parameters:
+    scores: non-negative integer scores, shape (B, n)
+    t (int): number of columns to select in each row (all columns if t > n)
+
+    Returns:
+    supports (ndarray): sorted indices of the selected columns, shape (B, min(t, n))
+    """
+    scores = np.asarray(scores, dtype=np.int64)
+    num_columns = scores.shape[1]
+    t = min(t, num_columns)
+    if t == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+
+    # Unique keys: higher score first, then lower column index
+    keys = scores * num_columns + (num_columns - 1 - np.arange(num_columns))
+    supports = np.argpartition(-keys, t - 1, axis=1)[:, :t]
+    return np.sort(supports, axis=1)
+
+def calculate_m_batch(H, Y, t, complement=False):
+    """
+    Batched version of calculate_m: computes the candidates of B syndromes against the same H.
+    All score vectors are computed as one matrix product Y * H (= (H^T * Y^T)^T), and the top t
+    columns of every row are selected at once.
+
+    Parameters:
+    H: bit-packed matrix (BitMatrix or sentinel format), shape (k, units)
+    Y: syndromes, shape (B, k)
+    t (int): Hamming weight of the candidates
+    complement (bool): rank columns by Phi + Phi_c (see complement_score) instead of Phi
+
+    Returns:
+    M (BitMatrix): candidate of each syndrome, shape (B, n)
+    """
+    H = as_bitmatrix(H)
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.int64))
+
+    # Float results are exact while every score fits into the mantissa
+    float_type = np.float32 if int(Y.sum(axis=1).max(initial=0)) < 2 ** 24 else np.float64
+    phi = Y.astype(float_type) @ H.to_bits().astype(float_type)
+
+    phi = np.rint(phi).astype(np.int64)
+    if complement:
+        # Scores are shifted to be non-negative, which does not change the ranking
+        phi = complement_score(phi, H.column_weights(), Y, t)
+        phi -= phi.min(axis=1, keepdims=True)
+
+    supports = select_top_t_batch(phi, t)
+    return BitMatrix.from_supports(supports, H.n)
+
+def decode_batch(H, Y, t, complement=False, early_exit=True):
+    """
+    Decodes B syndromes against the same H in one call.
+
+    Parameters:
+    H: bit-packed matrix (BitMatrix or sentinel format), shape (k, units)
+    Y: syndromes, shape (B, k)
+    t (int): Hamming weight of the searched vectors
+    complement (bool): rank columns by Phi + Phi_c instead of Phi
+    early_exit (bool): verify with early exit (see IsSolutionBatch), set False when most
+                       candidates are expected to be solutions
+
+    Returns:
+    success (ndarray): boolean vector, True where the candidate reproduces its syndrome
+    """
+    H = as_bitmatrix(H)
+    M = calculate_m_batch(H, Y, t, complement)
+    return IsSolutionBatch(H, Y, M, early_exit)
 
 if __name__ == "__main__":
     H, m = generate(n, k, t)
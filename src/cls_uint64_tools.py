@@ -1,7 +1,16 @@
 import math
+import os
+import timeit
+import warnings
 
 import numpy as np
 
+# Size of one unpacked chunk of candidates in batched kernels (fits into a typical L2 cache)
+BATCH_CACHE_BYTES = 1 << 20
+
+# Number of rows in the first block of the early-exit verification (doubled for every further block)
+VERIFY_BLOCK_ROWS = 16
+
 def pack2uint64(data):
     """
     Converts rows of a matrix or a vector into bit-packed uint64 format
@@ -9,6 +18,11 @@ def pack2uint64(data):
     allows extraction of useful bits. Last uint64 unit is right-padded
     with 0 up to 64 bits.
 
+    The whole matrix is packed at once: the sentinel column is written
+    next to the data bits, every row is padded to a multiple of 64 bits
+    and packed with a single np.packbits call, so there is no Python loop
+    over rows or uint64 units.
+
     Parameters:
     data: binary matrix or vector
 
@@ -17,33 +31,56 @@ def pack2uint64(data):
                            with included sentinel bit which marks the
                            end of useful bits.
     """
-    data_packed = []
+    data = np.asarray(data)
+
+    if data.ndim == 1: # Data is a vector -> pack it as a matrix with one row
+        return pack2uint64(data[np.newaxis, :])[0]
+
+    rows, num_bits = data.shape
+
+    # Calculate number of uint64 units
+    # (includes all elements, extra '1' bit
+    # and padded zeros up to multiple of 64).
+    num_units = math.ceil((num_bits + 1) / 64)
+
+    # Data bits, sentinel '1' and zero padding, row by row
+    data_bits = np.zeros((rows, num_units * 64), dtype=np.uint8)
+    data_bits[:, :num_bits] = data
+    data_bits[:, num_bits] = 1
+
+    return _packbits_uint64(data_bits)
+
+def unpack_uint64(data, num_bits=None):
+    """
+    Converts a bit-packed uint64 matrix or vector (with sentinel bit)
+    back into binary format. This is the inverse of pack2uint64.
 
-    if data.ndim == 2: # Data is a matrix -> pack each row into uint64 units
-        for row_cnt in range(data.shape[0]):
-            data_packed.append(pack2uint64(data[row_cnt]))
-    else: # Data is a vector -> pack it into uint64 units
-        # Calculate number of uint64 units
-        # (includes all elements, extra '1' bit
-        # and padded zeros up to multiple of 64).
-        num_units = math.ceil((data.shape[0] + 1) / 64)
+    Parameters:
+    data: bit-packed uint64 matrix or vector
+    num_bits (int): number of useful bits; extracted from the sentinel
+                    bit when not given
 
-        # Append the sentinel '1' at the end
-        data_bits = np.append(data, 1)
+    Returns:
+    data_bits (ndarray): binary uint8 matrix or vector without sentinel bit
+    """
+    data_bits = _unpackbits_uint64(data)
 
-        data_packed = np.zeros(num_units, dtype=np.uint64)
+    if num_bits is None:
+        # Sentinel bit is the last set bit of each row, useful bits end before it
+        reversed_bits = data_bits.reshape(-1, data_bits.shape[-1])[:, ::-1]
+        num_bits = data_bits.shape[-1] - 1 - int(reversed_bits.argmax(axis=1).min())
 
-        for unit_cnt in range(num_units):
-            start_pos, end_pos = unit_cnt * 64, min((unit_cnt + 1) * 64, len(data_bits))
-            unit_bits = data_bits[start_pos:end_pos]
+    return data_bits[..., :num_bits]
 
-            if unit_bits.size > 0:
-                data_packed[unit_cnt] = np.packbits(np.pad(unit_bits,
-                                                           (0, 64 - len(unit_bits)),
-                                                           constant_values=0),
-                                                    bitorder='little').view(np.uint64)[0]
+def _packbits_uint64(data_bits):
+    """Packs binary rows whose length is a multiple of 64 into uint64 units (little bit order)."""
+    packed = np.packbits(data_bits, axis=-1, bitorder='little')
+    return np.ascontiguousarray(packed).view('<u8').astype(np.uint64, copy=False)
 
-    return np.array(data_packed)
+def _unpackbits_uint64(data):
+    """Unpacks uint64 units into binary rows of 64 bits per unit (little bit order)."""
+    data = np.ascontiguousarray(data, dtype='<u8')
+    return np.unpackbits(data.view(np.uint8), axis=-1, bitorder='little')
 
 def packed_uint64_length(data):
     """
@@ -57,37 +94,49 @@ def packed_uint64_length(data):
     sentinel_pos (uint64): index of sentinel bit in the full
                            binary format of data.
     """
-    sentinel_pos = 0
-    full_units = 0
-    last_unit = 0
+    data = np.asarray(data, dtype=np.uint64)
 
-    if data.ndim > 1:
-        # Data is a matrix -> The sentinel bit position's highest value is extracted recursively.
-        for row_cnt in range(data.shape[0]):
-            sentinel_pos = max(sentinel_pos, packed_uint64_length(data[row_cnt]))
-    else:
-        match data.ndim:
-            case 0:
-                # Data is one uint64 unit -> The position of the sentinel bit is extracted.
-                last_unit = int(data)
-            case 1:
-                # Data is a vector of uint64 units -> The total bits in all uint64 units, except
-                # the last uint64 unit + position of the sentinel bit in the last uint64 unit is
-                # extracted.
-                full_units = len(data) - 1
-                last_unit = int(data[-1])
+    # Total bits in all uint64 units, except the last uint64 unit
+    full_units = data.shape[-1] - 1 if data.ndim > 0 else 0
 
-        sentinel_pos = np.uint64(full_units * 64) + np.uint64(last_unit.bit_length() - 1)
+    # Position of the sentinel bit in the last uint64 unit
+    # (for a matrix, the highest value over all rows is taken).
+    sentinel_bits = _sentinel_bit_positions(data)
 
-    return sentinel_pos
+    return np.uint64(full_units * 64) + np.uint64(sentinel_bits.max())
+
+def _sentinel_bit_positions(data):
+    """Returns the position of the highest set bit of the last uint64 unit of each row."""
+    last_units = data[..., -1] if data.ndim > 0 else data
+    last_bits = _unpackbits_uint64(np.atleast_1d(last_units)[..., np.newaxis])
+    return 63 - last_bits[..., ::-1].argmax(axis=-1)
 
 def popcount_uint64(data):
     """
     Efficiently computes the population count (number of set bits) in a bit-packed uint64 format
     of a vector or rows of a matrix.
 
-    This method uses a series of bitwise operations known as the "Hacker's Delight" algorithm to
-    quickly count the number of 1-bits (also known as the Hamming weight) in each uint64 integer:
+    The counting is delegated to the active popcount backend (see set_popcount_backend), which is
+    selected at import time as the fastest implementation available in the installed NumPy, or by
+    the ISD_POPCOUNT environment variable. Every backend returns counts of dtype np.uint64 with the
+    shape of data, so arithmetic on the counts does not depend on the selected backend.
+    """
+    return _popcount_backend(data)
+
+def _popcount_bitwise_count(data):
+    """Counts set bits with np.bitwise_count (hardware popcount, NumPy >= 2.0)."""
+    return np.bitwise_count(np.asarray(data, dtype=np.uint64)).astype(np.uint64, copy=False)
+
+def _popcount_lut(data):
+    """Counts set bits with a 65536-entry lookup table over a uint16 view of the data."""
+    data = np.asarray(data, dtype=np.uint64)
+    counts = _POPCOUNT_TABLE[np.ascontiguousarray(data).view(np.uint16)].reshape(data.shape + (4,))
+    return (counts[..., 0] + counts[..., 1] + counts[..., 2] + counts[..., 3]).astype(np.uint64, copy=False)
+
+def _popcount_swar(data):
+    """
+    Counts set bits with a series of bitwise operations known as the "Hacker's Delight" algorithm,
+    which counts the number of 1-bits (also known as the Hamming weight) in each uint64 integer:
 
     1. arr - ((arr >> 1) & 0x5555555555555555):
        Counts bits in pairs, subtracting bits shifted right by 1 and masked.
@@ -107,34 +156,373 @@ def popcount_uint64(data):
     data = (data + (data >> 4)) & 0x0F0F0F0F0F0F0F0F
     return ((data * 0x0101010101010101) >> 56) & 0x7F
 
+# Number of set bits of every uint16 value
+_POPCOUNT_TABLE = np.unpackbits(np.arange(1 << 16, dtype='<u2').view(np.uint8).reshape(-1, 2),
+                                axis=1).sum(axis=1, dtype=np.uint8)
+
+# Available popcount backends, ordered from the fastest to the slowest
+POPCOUNT_BACKENDS = {}
+if hasattr(np, "bitwise_count"):
+    POPCOUNT_BACKENDS["bitwise_count"] = _popcount_bitwise_count
+POPCOUNT_BACKENDS["lut"] = _popcount_lut
+POPCOUNT_BACKENDS["swar"] = _popcount_swar
+
+def set_popcount_backend(name):
+    """
+    Selects the implementation used by popcount_uint64.
+
+    Parameters:
+    name (str): name of a backend in POPCOUNT_BACKENDS
+
+    Raises:
+    ValueError: if the backend is not available
+    """
+    global _popcount_backend, _popcount_backend_name
+
+    if name not in POPCOUNT_BACKENDS:
+        raise ValueError(f"Unknown popcount backend '{name}', "
+                         f"available backends: {', '.join(POPCOUNT_BACKENDS)}")
+
+    _popcount_backend = POPCOUNT_BACKENDS[name]
+    _popcount_backend_name = name
+
+def get_popcount_backend():
+    """Returns the name of the backend used by popcount_uint64."""
+    return _popcount_backend_name
+
+def benchmark_popcount(num_words=1 << 20, repeats=5):
+    """
+    Micro-benchmark of all available popcount backends on random uint64 words.
+
+    Parameters:
+    num_words (int): number of uint64 words counted per run
+    repeats (int): number of runs, the fastest one is reported
+
+    Returns:
+    dict: backend name -> throughput in words/s
+    """
+    data = np.random.randint(0, 2 ** 63, size=num_words, dtype=np.int64).view(np.uint64)
+    expected = _popcount_swar(data)
+
+    results = {}
+    for name, backend in POPCOUNT_BACKENDS.items():
+        # Check correctness (and warm up) before timing
+        if not (backend(data) == expected).all():
+            raise RuntimeError(f"Popcount backend '{name}' returned wrong results")
+
+        best_time = min(timeit.repeat(lambda: backend(data), number=1, repeat=repeats))
+        results[name] = num_words / best_time
+
+    return results
+
+def _select_popcount_backend_from_env():
+    """Selects the backend named by ISD_POPCOUNT, falling back to the default backend with a warning."""
+    default_name = next(iter(POPCOUNT_BACKENDS))
+    name = os.environ.get("ISD_POPCOUNT", default_name)
+    if name not in POPCOUNT_BACKENDS:
+        warnings.warn(f"Unknown popcount backend '{name}' in ISD_POPCOUNT, using '{default_name}' "
+                      f"(available backends: {', '.join(POPCOUNT_BACKENDS)})")
+        name = default_name
+    set_popcount_backend(name)
+
+_select_popcount_backend_from_env()
+
 def clear_sentinel_bit(data):
     """Clears the sentinel bit (rightmost set bit) from last uint64 value."""
-    data_cleared = []
+    # Copy to avoid changing original
+    data_cleared = np.array(data, dtype=np.uint64)
+
+    # Process only the last uint64 unit of each row (assuming sentinel appears there)
+    sentinel_bits = _sentinel_bit_positions(data_cleared).astype(np.uint64)
+    data_cleared[..., -1] &= ~(np.uint64(1) << sentinel_bits.reshape(data_cleared.shape[:-1]))
+
+    return data_cleared
+
+class BitVector:
+    """
+    Bit-packed uint64 vector which stores its number of useful bits (n)
+    explicitly instead of encoding it with a sentinel bit. The layout of
+    the uint64 units is the same as in pack2uint64, but all padding bits
+    (including the place of the sentinel bit) are zero, so kernels can
+    work on the data directly without clearing or copying it.
+    """
+    __slots__ = ("data", "n")
+
+    def __init__(self, data, n):
+        self.data = np.asarray(data, dtype=np.uint64)
+        self.n = int(n)
+
+    @classmethod
+    def from_bits(cls, bits):
+        """Creates a BitVector from a binary vector."""
+        bits = np.asarray(bits)
+        return cls(clear_sentinel_bit(pack2uint64(bits)), bits.shape[0])
+
+    @classmethod
+    def from_sentinel(cls, data):
+        """Creates a BitVector from a bit-packed uint64 vector with sentinel bit."""
+        return cls(clear_sentinel_bit(data), packed_uint64_length(data))
+
+    def to_bits(self):
+        """Returns the vector in binary format."""
+        return unpack_uint64(self.data, self.n)
+
+    def to_sentinel(self):
+        """Returns the vector in bit-packed uint64 format with sentinel bit."""
+        return _set_sentinel_bit(self.data, self.n)
+
+    @classmethod
+    def from_support(cls, support, n):
+        """Creates a BitVector of n bits from the sorted indices of its set bits."""
+        support = np.asarray(support, dtype=np.int64)
+        data = np.zeros(math.ceil((n + 1) / 64), dtype=np.uint64)
+        np.bitwise_or.at(data, support >> 6, np.uint64(1) << (support & 63).astype(np.uint64))
+        return cls(data, n)
+
+    def support(self):
+        """Returns the sorted indices of the set bits of the vector."""
+        return np.flatnonzero(_unpackbits_uint64(self.data)[:self.n])
+
+    def __len__(self):
+        return self.n
+
+class BitMatrix:
+    """
+    Bit-packed uint64 matrix of k rows and n columns, which stores its
+    dimensions explicitly instead of encoding n with sentinel bits. The
+    layout of the uint64 units is the same as in pack2uint64, but all
+    padding bits (including the place of the sentinel bits) are zero.
+
+    The data is treated as read-only: a column-packed (transposed) copy
+    and the column weights are cached on first use by the column access methods.
+    """
+    __slots__ = ("data", "n", "k", "_columns", "_column_weights")
+
+    def __init__(self, data, n):
+        self.data = np.asarray(data, dtype=np.uint64)
+        self.n = int(n)
+        self.k = self.data.shape[0]
+        self._columns = None
+        self._column_weights = None
+
+    @classmethod
+    def from_bits(cls, bits):
+        """Creates a BitMatrix from a binary matrix."""
+        bits = np.asarray(bits)
+        return cls(clear_sentinel_bit(pack2uint64(bits)), bits.shape[1])
+
+    @classmethod
+    def from_sentinel(cls, data):
+        """Creates a BitMatrix from a bit-packed uint64 matrix with sentinel bits."""
+        return cls(clear_sentinel_bit(data), packed_uint64_length(data))
+
+    def to_bits(self):
+        """Returns the matrix in binary format."""
+        return unpack_uint64(self.data, self.n)
+
+    def to_sentinel(self):
+        """Returns the matrix in bit-packed uint64 format with sentinel bits."""
+        return _set_sentinel_bit(self.data, self.n)
+
+    def row(self, idx):
+        """Returns row idx as a BitVector sharing the same buffer."""
+        return BitVector(self.data[idx], self.n)
+
+    def transpose(self):
+        """Returns the transposed matrix (shape (n, k)) as a BitMatrix, built from the cached columns."""
+        data_T = self.columns()
+        # Keep the pack2uint64 layout, which has room for the sentinel bit after k bits
+        num_units = math.ceil((self.k + 1) / 64)
+        if data_T.shape[1] < num_units:
+            data_T = np.pad(data_T, ((0, 0), (0, num_units - data_T.shape[1])))
+        return BitMatrix(data_T, self.k)
+
+    @classmethod
+    def from_supports(cls, supports, n):
+        """Creates a BitMatrix of n columns from the indices of the set bits of each row, shape (rows, t)."""
+        supports = np.asarray(supports, dtype=np.int64)
+        data = np.zeros((supports.shape[0], math.ceil((n + 1) / 64)), dtype=np.uint64)
+        rows = np.repeat(np.arange(supports.shape[0]), supports.shape[1])
+        np.bitwise_or.at(data, (rows, supports.ravel() >> 6),
+                         np.uint64(1) << (supports.ravel() & 63).astype(np.uint64))
+        return cls(data, n)
+
+    def columns(self):
+        """Returns the cached column-packed copy of H, shape (n, ceil(k / 64))."""
+        if self._columns is None:
+            self._columns = transpose_uint64(self.data, self.n)
+        return self._columns
+
+    def column_weights(self):
+        """Returns the cached number of ones in each column, shape (n,)."""
+        if self._column_weights is None:
+            self._column_weights = popcount_uint64(self.columns()).sum(axis=1, dtype=np.int64)
+        return self._column_weights
+
+    def column_bits(self, idx):
+        """Returns the selected columns in binary format, shape (len(idx), k)."""
+        return _unpackbits_uint64(self.columns()[idx])[..., :self.k]
+
+    def __getitem__(self, rows):
+        """Returns the selected rows as a BitMatrix."""
+        return BitMatrix(self.data[np.atleast_1d(np.arange(self.k)[rows])], self.n)
+
+    @property
+    def shape(self):
+        return self.k, self.n
+
+def transpose_uint64(data, num_columns):
+    """
+    Transposes a bit-packed uint64 matrix without unpacking it into one byte per bit.
+
+    The matrix is cut into 64x64 bit blocks (64 rows by one uint64 unit) and all blocks
+    are transposed at once with the recursive block swap of "Hacker's Delight": in 6 steps,
+    the upper-right and lower-left j x j sub-blocks (j = 32, 16, ..., 1) of every 2j x 2j
+    sub-block are swapped using shifts and masks.
+
+    Parameters:
+    data: bit-packed uint64 matrix without sentinel bits, shape (k, units)
+    num_columns (int): number of useful columns (n) of the matrix
+
+    Returns:
+    data_T (ndarray): bit-packed uint64 transposed matrix, shape (n, ceil(k / 64))
+    """
+    data = np.asarray(data, dtype=np.uint64)
+    num_rows, num_units = data.shape
+    row_blocks = math.ceil(num_rows / 64)
+
+    # Blocks of 64 rows x 1 unit, indexed by (row block, unit, row in block)
+    blocks = np.zeros((row_blocks * 64, num_units), dtype=np.uint64)
+    blocks[:num_rows] = data
+    blocks = np.ascontiguousarray(blocks.reshape(row_blocks, 64, num_units).transpose(0, 2, 1))
+
+    for shift, mask in _TRANSPOSE_STEPS:
+        low_rows, high_rows = _transpose_rows(int(shift))
+        low, high = blocks[..., low_rows], blocks[..., high_rows]
+        swap_bits = ((low >> shift) ^ high) & mask
+        blocks[..., low_rows] = low ^ (swap_bits << shift)
+        blocks[..., high_rows] = high ^ swap_bits
+
+    # After the block transposes, unit (row block, unit, c) holds column unit * 64 + c
+    data_T = blocks.transpose(1, 2, 0).reshape(num_units * 64, row_blocks)
+    return np.ascontiguousarray(data_T[:num_columns])
+
+def _transpose_rows(shift):
+    """Returns the rows of a 64x64 block which are swapped with the rows shift below them."""
+    low_rows = np.array([row for row in range(64) if not row & shift])
+    return low_rows, low_rows + shift
+
+# Shifts and masks of the lower j bits of every 2j bits for the 64x64 block transpose
+_TRANSPOSE_STEPS = [(np.uint64(shift), np.uint64(mask)) for shift, mask in (
+    (32, 0x00000000FFFFFFFF),
+    (16, 0x0000FFFF0000FFFF),
+    (8, 0x00FF00FF00FF00FF),
+    (4, 0x0F0F0F0F0F0F0F0F),
+    (2, 0x3333333333333333),
+    (1, 0x5555555555555555))]
+
+class BitPlanePhi:
+    """
+    Bit-plane engine for the column scores Phi = H^T * y of a non-negative integer vector y.
+
+    Uses the cached column-packed copy of the BitMatrix H (H.columns()), where row j holds
+    column j of H as k bits, so no second transposed copy of H is kept.
+    y is decomposed into its bit-planes y = sum(2^b * y_b), where every y_b is a binary vector
+    packed into uint64 units, and Phi[j] = sum(2^b * popcount(H^T[j] & y_b)). As the values of y
+    are at most t, only ceil(log2(t + 1)) planes are needed, and Phi is computed using AND and
+    popcount over packed words only.
+    """
+    __slots__ = ("H",)
 
-    if data.ndim == 2: # Data is a matrix -> clear sentinel bit from each row of uint64 units
-        for row_cnt in range(data.shape[0]):
-            data_cleared.append(clear_sentinel_bit(data[row_cnt]))
-    else: # Data is a vector -> clear sentinel bit
-        # Copy to avoid changing original
-        data_cleared = data.copy()
+    def __init__(self, H):
+        _require_bitmatrix(H)
+        self.H = H
 
-        # Process only the last uint64 unit (assuming sentinel appears there)
-        last_unit = data_cleared[-1]
+    def phi(self, y):
+        """
+        Computes Phi = H^T * y.
 
-        # Clear sentinel bit
-        data_cleared[-1] = last_unit & ~(np.uint64(1) << packed_uint64_length(last_unit))
+        Parameters:
+        y: non-negative integer vector, shape (k,)
 
-    return np.array(data_cleared)
+        Returns:
+        Phi (ndarray): dtype=np.uint64, shape=(n,), dot product of y with every column of H
+        """
+        y = np.asarray(y, dtype=np.uint64)
+        num_planes = int(y.max()).bit_length() if y.size else 0
 
+        # Bit-planes of y packed into uint64 units, shape (num_planes, ceil(k / 64))
+        plane_bits = ((y[np.newaxis, :] >> np.arange(num_planes, dtype=np.uint64)[:, np.newaxis]) & 1)
+        planes = _pack_bits(plane_bits.astype(np.uint8))
+
+        H_T = self.H.columns()
+        result = np.zeros(self.H.n, dtype=np.uint64)
+        for plane_idx in range(num_planes):
+            plane_counts = popcount_uint64(H_T & planes[plane_idx]).sum(axis=1, dtype=np.uint64)
+            result += plane_counts << np.uint64(plane_idx)
+
+        return result
+
+def _pack_bits(data_bits):
+    """Packs binary rows into uint64 units without sentinel bit, zero padded up to a multiple of 64 bits."""
+    data_bits = np.asarray(data_bits, dtype=np.uint8)
+    num_units = math.ceil(data_bits.shape[-1] / 64)
+    padding = [(0, 0)] * (data_bits.ndim - 1) + [(0, num_units * 64 - data_bits.shape[-1])]
+    return _packbits_uint64(np.pad(data_bits, padding))
+
+def permute_columns(H, permutation):
+    """
+    Permutes the columns of a bit-packed matrix (H[:, permutation]) using packed transposes.
+
+    Parameters:
+    H: bit-packed matrix (BitMatrix or sentinel format)
+    permutation: column indices of the result
+
+    Returns:
+    H_permuted (BitMatrix): matrix with columns taken from H in the given order
+    """
+    H = as_bitmatrix(H)
+    return H.transpose()[permutation].transpose()
+
+def as_bitmatrix(H):
+    """Returns H as a BitMatrix, converting it from sentinel format if needed."""
+    return H if isinstance(H, BitMatrix) else BitMatrix.from_sentinel(H)
+
+def as_bitvector(m):
+    """Returns m as a BitVector, converting it from sentinel format if needed."""
+    return m if isinstance(m, BitVector) else BitVector.from_sentinel(m)
+
+def _require_bitmatrix(H):
+    """Raises TypeError unless H is a BitMatrix (kernels relying on its cached columns)."""
+    if not isinstance(H, BitMatrix):
+        raise TypeError("H must be a BitMatrix, convert sentinel format once with BitMatrix.from_sentinel.")
+
+def _clean_rows(H, start, stop):
+    """Returns rows start .. stop - 1 of a bit-packed matrix without sentinel bits."""
+    if isinstance(H, BitMatrix):
+        return H.data[start:stop]
+    return clear_sentinel_bit(np.asarray(H)[start:stop])
+
+def _set_sentinel_bit(data, num_bits):
+    """Returns a copy of clean bit-packed data with the sentinel bit set after num_bits."""
+    data_sentinel = np.array(data, dtype=np.uint64)
+    data_sentinel[..., num_bits // 64] |= np.uint64(1) << np.uint64(num_bits % 64)
+    return data_sentinel
+
+def _clean_data(data):
+    """Returns the bit-packed uint64 data of a container or of a sentinel format array without sentinel bits."""
+    if isinstance(data, (BitMatrix, BitVector)):
+        return data.data
+    return clear_sentinel_bit(data)
 
 def bitpacked_dot_row_optimized(H, m):
     """
     Optimized dot product between bit-packed matrix H and vector m,
     each stored in bit-packed uint64 format.
     """
-    # Clear sentinel bits
-    H_clean = clear_sentinel_bit(H)
-    m_clean = clear_sentinel_bit(m)
+    # Clear sentinel bits (BitMatrix / BitVector data is already clean)
+    H_clean = _clean_data(H)
+    m_clean = _clean_data(m)
 
     # Perform bitwise AND between each row of the matrix and vector
     and_result = H_clean & m_clean
@@ -145,6 +533,196 @@ def bitpacked_dot_row_optimized(H, m):
     result = bit_counts.sum(axis=1)
     return result
 
+def verify_row(H, y, m):
+    """
+    Checks H * m == y with early exit: the dot products are computed for blocks of rows
+    (VERIFY_BLOCK_ROWS rows first, doubling the block size after every matching block),
+    and the check stops at the first block with a mismatch. Most wrong candidates differ
+    from y in the first rows, so they are rejected after a small fraction of the work,
+    while a solution costs at most one full dot product plus O(log k) block overhead.
+    Sentinel bits of H are cleared block by block, so rejected candidates never pay
+    for a clean copy of the whole matrix.
+
+    Parameters:
+    H: bit-packed matrix (BitMatrix or sentinel format), shape (k, units)
+    y: syndrome, shape (k,)
+    m: bit-packed vector (BitVector or sentinel format), shape (units,)
+
+    Returns:
+    bool: True if m reproduces y
+    """
+    m_clean = _clean_data(m)
+    y = np.asarray(y)
+    num_rows = y.shape[0]
+
+    start, block_rows = 0, VERIFY_BLOCK_ROWS
+    while start < num_rows:
+        stop = min(start + block_rows, num_rows)
+        if (popcount_uint64(_clean_rows(H, start, stop) & m_clean).sum(axis=1) != y[start:stop]).any():
+            return False
+        start, block_rows = stop, 2 * block_rows
+
+    return True
+
+def verify_row_batch(H, y, M, early_exit=True):
+    """
+    Batched version of verify_row: checks every row of the candidate matrix M block by block,
+    and drops the rejected candidates, so later (larger) row blocks are computed only for the
+    candidates which matched all previous rows. Within a block the candidates are processed
+    in chunks, so the AND result fits into BATCH_CACHE_BYTES.
+
+    The early exit pays off when most candidates are wrong. If most candidates are solutions,
+    every block is computed for almost all of them with AND + popcount, which is about 2x
+    slower than the single float32 matrix product of bitpacked_dot_row_batch; early_exit=False
+    uses that product instead.
+
+    Parameters:
+    H: bit-packed matrix (BitMatrix or sentinel format), shape (k, units)
+    y: one syndrome for all candidates, shape (k,), or one syndrome per candidate, shape (B, k)
+    M: bit-packed candidate matrix (BitMatrix or sentinel format), shape (B, units)
+    early_exit (bool): check row blocks with early exit (True) or all rows at once with BLAS (False)
+
+    Returns:
+    ndarray: boolean vector, shape (B,), True where the candidate reproduces its syndrome
+    """
+    if not early_exit:
+        return (bitpacked_dot_row_batch(H, M) == np.atleast_2d(y)).all(axis=1)
+
+    M_clean = _clean_data(M)
+    if M_clean.ndim == 1:
+        M_clean = M_clean[np.newaxis, :]
+    Y = np.asarray(y)
+    if Y.ndim == 1:
+        Y = Y[np.newaxis, :]
+
+    num_rows, num_units = Y.shape[1], M_clean.shape[1]
+    alive = np.arange(M_clean.shape[0])
+    start, block_rows = 0, VERIFY_BLOCK_ROWS
+    while start < num_rows and alive.size:
+        stop = min(start + block_rows, num_rows)
+        H_block = _clean_rows(H, start, stop)
+        chunk_size = max(1, BATCH_CACHE_BYTES // ((stop - start) * num_units * 8))
+
+        matching = np.empty(alive.size, dtype=bool)
+        for chunk_start in range(0, alive.size, chunk_size):
+            chunk = alive[chunk_start:chunk_start + chunk_size]
+            counts = popcount_uint64(M_clean[chunk, np.newaxis, :] & H_block).sum(axis=2)
+            Y_block = Y[chunk if Y.shape[0] > 1 else 0, start:stop]
+            matching[chunk_start:chunk_start + chunk_size] = (counts == Y_block).all(axis=1)
+
+        alive = alive[matching]
+        start, block_rows = stop, 2 * block_rows
+
+    result = np.zeros(M_clean.shape[0], dtype=bool)
+    result[alive] = True
+    return result
+
+def bitpacked_dot_support(H, support):
+    """
+    Dot product between bit-packed matrix H and a low-weight vector m given by the
+    sorted indices of its set bits (support). The result is the sum of the selected
+    columns, taken from the cached column-packed copy of H, so its cost is O(t * k)
+    instead of O(n * k).
+
+    The column cache lives on the BitMatrix, so H must be a BitMatrix which the caller
+    keeps between calls (convert sentinel format once with BitMatrix.from_sentinel):
+    a temporary conversion would rebuild the cache with a full transpose on every call.
+
+    Parameters:
+    H (BitMatrix): bit-packed matrix, shape (k, n)
+    support: indices of the set bits of m, shape (t,)
+
+    Returns:
+    y (ndarray): dtype=np.uint64, shape=(k,)
+    """
+    _require_bitmatrix(H)
+    return H.column_bits(np.asarray(support, dtype=np.int64)).sum(axis=0, dtype=np.uint64)
+
+class IncrementalSyndrome:
+    """
+    Syndrome y = H * m of a candidate m (given by its support), which is updated
+    in O(k) when a bit of m is flipped, by adding or subtracting one cached column
+    of H. A running count of the rows where y differs from the target syndrome is
+    kept as well, so checking whether m is a solution costs O(1).
+    H must be a BitMatrix (see bitpacked_dot_support), so its column cache is shared
+    by all syndromes built on it.
+    """
+    __slots__ = ("H", "y_target", "y", "in_support", "mismatches")
+
+    def __init__(self, H, y_target, support=()):
+        _require_bitmatrix(H)
+        self.H = H
+        self.y_target = np.asarray(y_target, dtype=np.int64)
+
+        support = np.asarray(support, dtype=np.int64)
+        self.in_support = np.zeros(self.H.n, dtype=bool)
+        self.in_support[support] = True
+
+        self.y = bitpacked_dot_support(self.H, support).astype(np.int64)
+        self.mismatches = int(np.count_nonzero(self.y != self.y_target))
+
+    def flip(self, idx):
+        """Flips bit idx of the candidate and updates the syndrome."""
+        rows = np.flatnonzero(self.H.column_bits(idx))
+        mismatches_before = np.count_nonzero(self.y[rows] != self.y_target[rows])
+
+        # Remove column idx if it is in the support, add it otherwise
+        self.y[rows] += -1 if self.in_support[idx] else 1
+        self.in_support[idx] = not self.in_support[idx]
+
+        self.mismatches += np.count_nonzero(self.y[rows] != self.y_target[rows]) - mismatches_before
+
+    def swap(self, out_idx, in_idx):
+        """Replaces position out_idx of the support with position in_idx."""
+        self.flip(out_idx)
+        self.flip(in_idx)
+
+    def is_solution(self):
+        """Returns True if the syndrome of the candidate equals the target syndrome."""
+        return self.mismatches == 0
+
+    def support(self):
+        """Returns the sorted indices of the set bits of the candidate."""
+        return np.flatnonzero(self.in_support)
+
+    def residual(self):
+        """Returns y_target - H * m."""
+        return self.y_target - self.y
+
+def bitpacked_dot_row_batch(H, M, chunk_size=0):
+    """
+    Batched version of bitpacked_dot_row_optimized: computes the dot product between
+    bit-packed matrix H and every row of a bit-packed candidate matrix M in one call.
+
+    H is unpacked once, and the candidates are unpacked chunk by chunk, so the unpacked
+    chunk fits into BATCH_CACHE_BYTES. Each chunk is multiplied with H by one float32
+    matrix product (BLAS), which is exact as long as n < 2^24.
+
+    Parameters:
+    H: bit-packed matrix (BitMatrix or sentinel format), shape (k, units)
+    M: bit-packed candidate matrix (BitMatrix or sentinel format), shape (B, units)
+    chunk_size (int): number of candidates per chunk, derived from BATCH_CACHE_BYTES if 0
+
+    Returns:
+    Y (ndarray): dtype=np.uint64, shape=(B, k), syndrome of every candidate
+    """
+    H_clean = _clean_data(H)
+    M_clean = _clean_data(M)
+    if M_clean.ndim == 1:
+        M_clean = M_clean[np.newaxis, :]
+
+    # Unpacked transposed H, shape (units * 64, k)
+    H_bits_T = _unpackbits_uint64(H_clean).T.astype(np.float32)
+
+    if chunk_size == 0:
+        chunk_size = max(1, BATCH_CACHE_BYTES // (H_bits_T.shape[0] * 4))
+
+    Y = np.empty((M_clean.shape[0], H_clean.shape[0]), dtype=np.uint64)
+    for start in range(0, M_clean.shape[0], chunk_size):
+        M_bits = _unpackbits_uint64(M_clean[start:start + chunk_size]).astype(np.float32)
+        Y[start:start + chunk_size] = M_bits @ H_bits_T
+
+    return Y
 
 def bitpacked_dot_row_readable(H, m):
     """
@@ -152,9 +730,9 @@ def bitpacked_dot_row_readable(H, m):
     to binary format using np.unpackbits and performing dot product between them.
     """
 
-    # Clear sentinel bits
-    H_clean = clear_sentinel_bit(H)
-    m_clean = clear_sentinel_bit(m)
+    # Clear sentinel bits (BitMatrix / BitVector data is already clean)
+    H_clean = _clean_data(H)
+    m_clean = _clean_data(m)
 
     # Unpack bits from H and m
     H_bits = np.unpackbits(H_clean.view(np.uint8), axis=1,  bitorder='little')
@@ -176,26 +754,31 @@ def bitpacked_dot_column_optimized(H, y, num_columns=0, with_idx=False):
     :param num_columns: int, total columns excluding sentinel bit
     :return: np.array, dtype=np.uint64, shape=(num_columns,), dot product per column
     """
+    # BitMatrix stores number of useful columns explicitly
+    if isinstance(H, BitMatrix):
+        num_columns = num_columns or H.n
+        H = H.data
+
     # Extract number of useful columns
     if num_columns == 0:
         num_columns = packed_uint64_length(H)
 
-    result = np.zeros(num_columns, dtype=np.uint64)
-
-    # Iterate through each binary column
-    for col_idx in range(num_columns):
-        # Determine which uint64 unit and which bit within that unit
-        unit_idx = col_idx // 64
-        bit_idx = col_idx % 64
+    # Unpack all columns of H at once (sentinel and padding bits are cut off)
+    H_bits = _unpackbits_uint64(H)[:, :num_columns]
 
-        # Extract bits from all rows simultaneously
-        column_bits = (H[:, unit_idx] >> bit_idx) & 1
-
-        # Compute dot product with y efficiently
-        result[col_idx] = np.dot(y, column_bits)
+    # Compute dot product of y with every column in one vector-matrix product (BLAS).
+    # Float results are exact while every dot product fits into the mantissa.
+    y = np.asarray(y, dtype=np.uint64)
+    float_type = np.float32 if int(y.sum()) < 2 ** 24 else np.float64
+    result = np.dot(y.astype(float_type), H_bits.astype(float_type)).astype(np.uint64)
 
     if with_idx:
         # Convert result to a list of tuples with column indices
         return [(col_idx, result[col_idx]) for col_idx in range(num_columns)]
     else:
-        return result
\ No newline at end of file
+        return result
+
+if __name__ == "__main__":
+    for backend_name, words_per_second in benchmark_popcount().items():
+        marker = "*" if backend_name == get_popcount_backend() else " "
+        print(f"{marker} {backend_name:<14}{words_per_second / 1e6:10.1f} Mwords/s")
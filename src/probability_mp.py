@@ -1,14 +1,21 @@
 import sys
 import numpy as np
 import multiprocessing as mp
-from cls_generate import generate_random_H, generate_random_m, compute_y
+from cls_generate import generate_H, generate_m_support, compute_y, make_rng, spawn_seeds
+from cls_uint64_tools import unpack_uint64
+from cls_method_1 import select_top_t, complement_score
 
 # Define size of random matrix H (n columns and k rows)
 n, k = 2000, 1000
 num_processes = 10  # Number of sub-processes per t
 
-# Generate random matrix H (Shared by all processes)
-H = generate_random_H(k, n)
+# Seed of the whole experiment: H and the stream of every worker are derived from it
+seed = 2025
+H_seed, trials_seed = spawn_seeds(seed, 2)
+
+# Generate random matrix H (Regenerated from its seed, so it is the same in all processes)
+H = unpack_uint64(generate_H(n, k, rng=make_rng(H_seed))).astype(np.int64)
+H_weights = H.sum(axis=0)  # Column weights of H
 
 def display_vector(vector):
     """Displays the current state of the shared vector in real-time."""
@@ -16,8 +23,9 @@ def display_vector(vector):
     sys.stdout.write("\033[2F")
     sys.stdout.flush()
 
-def process_chunk(t, start_i, end_i, vector, lock):
+def process_chunk(t, start_i, end_i, vector, lock, chunk_seed):
     """Processes a chunk of iterations for a given value of t and updates shared vector."""
+    rng = make_rng(chunk_seed)
     local_iterations = 0
     local_solutions = 0
     add_iterations = 0
@@ -32,35 +40,22 @@ def process_chunk(t, start_i, end_i, vector, lock):
         #    vector[t-1] = (vector[t-1][0] + 1, vector[t-1][1])
 
         # Generate random m with weight t
-        m = generate_random_m(n, t)
+        m = np.zeros(n, dtype=np.int64)
+        m[generate_m_support(n, t, rng)] = 1
 
         # Calculate y list
         y = compute_y(H, m)
 
         # Calculate Phi
         y_arr = np.array(y)
-        Phi = [(H_col, np.dot(y_arr, H[:, H_col])) for H_col in range(H.shape[1])]
-
-        # Calculate the complementary matrix of H
-        H_c = 1 - H
-
-        # Calculate y_c
-        y_c = [t - y_val for y_val in y]
-
-        # Calculate Phi_c
-        yc_arr = np.array(y_c)
-        Phi_c = [(H_col, np.dot(yc_arr, H_c[:, H_col])) for H_col in range(H_c.shape[1])]
+        Phi = y_arr @ H
 
-        # Calculate Score vector
-        Score = [(Phi[cnt][0], Phi[cnt][1] + Phi_c[cnt][1]) for cnt in range(len(Phi))]
+        # Calculate Score vector (Phi + Phi_c in closed form, without building H_c and y_c)
+        Score = complement_score(Phi, H_weights, y_arr, t)
 
-        # Sort Score vector descending
-        Score_sorted = sorted(Score, key=lambda x: x[1], reverse=True)
-
-        # Generate new "m" vector based on Score_sorted
-        new_m = [0] * H.shape[1]
-        for idx, (cnt, val) in enumerate(Score_sorted[:t]):
-            new_m[cnt] = 1
+        # Generate new "m" vector with ones at the t columns with highest score
+        new_m = np.zeros(H.shape[1], dtype=np.int64)
+        new_m[select_top_t(Score, t)[0]] = 1
 
         # Compute "new_y" from "H" and "new_m"
         new_y = compute_y(H, new_m)
@@ -83,16 +78,19 @@ def process_chunk(t, start_i, end_i, vector, lock):
     #    vector[t-1] = (vector[t-1][0] + local_iterations, vector[t-1][1] + local_solutions)
 
 
-def process_t(t, vector, lock):
+def process_t(t, vector, lock, t_seed):
     """Runs 100 processes in parallel for a given value of t."""
     total_iterations = 1000000
     chunk_size = total_iterations // num_processes
 
+    # Independent random stream for each sub-process
+    chunk_seeds = spawn_seeds(t_seed, num_processes)
+
     processes = []
     for i in range(num_processes):
         start_i = i * chunk_size + 1
         end_i = (i + 1) * chunk_size
-        p = mp.Process(target=process_chunk, args=(t, start_i, end_i, vector, lock))
+        p = mp.Process(target=process_chunk, args=(t, start_i, end_i, vector, lock, chunk_seeds[i]))
         p.start()
         processes.append(p)
 
@@ -113,9 +111,12 @@ if __name__ == "__main__":
         vector = manager.list([(0, 0)] * 20)  # Initialize shared vector
         lock = manager.Lock()  # Ensure atomic updates
 
+        # Independent random stream for each value of t
+        t_seeds = spawn_seeds(trials_seed, 20)
+
         processes = []
         for t in range(1,21):
-            p = mp.Process(target=process_t, args=(t, vector, lock))
+            p = mp.Process(target=process_t, args=(t, vector, lock, t_seeds[t - 1]))
             print(f"Starting processes for t={(2 - len(str(t))) * ' '}{str(t)}")
             p.start()
             processes.append(p)